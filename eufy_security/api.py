@@ -1,75 +1,438 @@
 """Define a base object for interacting with the Eufy camera API."""
+import asyncio
+import copy
 from datetime import datetime
+import json
 import logging
-from typing import Dict, Optional
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+from weakref import WeakSet, ref
 
 from aiohttp import ClientSession
-from aiohttp.client_exceptions import ClientError
+from aiohttp.client_exceptions import ClientError, ClientResponseError
 
-from .device import Device, DeviceDict, StationDict
-from .errors import InvalidCredentialsError, RequestError, raise_error
+from .breaker import STATE_CLOSED, CircuitBreakers
+from .buffer import ParamWriteBuffer
+from .coordinator import RefreshCoordinator
+from .device import BaseDevice, DeviceDict, StationDict
+from .errors import CircuitOpenError, InvalidCredentialsError, RequestError, raise_error
+from .events import Event
+from .limiter import RequestLimiter
+from .metrics import MetricsAggregator, MetricsHook, RequestSample
 from .param import Params
+from .retry import NO_RETRY, RetryPolicy
+from .store import Store
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
 API_BASE: str = "https://mysecurity.eufylife.com/api/v1"
 
+# Renew the access token this many seconds before it expires:
+DEFAULT_TOKEN_REFRESH_MARGIN: int = 600
+
+# How many stations receive parameter uploads at the same time by default:
+DEFAULT_BULK_CONCURRENCY: int = 4
+
+# How many history records are requested per page by default:
+DEFAULT_HISTORY_PAGE_SIZE: int = 100
+
+# Idempotent endpoints whose identical concurrent requests can share a response:
+DEDUPLICATED_ENDPOINTS: Set[str] = {
+    "app/get_devs_list",
+    "app/get_hub_list",
+    "event/app/get_all_history_record",
+    "event/app/get_history_by_time",
+    "hub/get_dev_info",
+    "hub/get_devs_params",
+    "web/equipment/start_stream",
+}
+
+
+def _body_size(body: Optional[dict]) -> int:
+    """Return the size of a JSON request body as aiohttp sends it."""
+    return 0 if body is None else len(json.dumps(body).encode())
+
+
+def _history_time(value: Union[datetime, int, None]) -> int:
+    """Return a history filter time as the API expects it."""
+    if value is None:
+        return 0
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return value
+
+
+def _refresh_token_in_background(api_ref: "ref[API]") -> None:
+    """Refresh the access token of an API object that is still in use."""
+    api = api_ref()
+    if api is not None:
+        api._refresh_token_in_background()  # pylint: disable=protected-access
+
+
+def _request_key(method: str, endpoint: str, body: Optional[dict]) -> Tuple:
+    """Return a key identifying a request by its method, endpoint and body."""
+    return (
+        method.lower(),
+        endpoint,
+        json.dumps(body, sort_keys=True, separators=(",", ":")),
+    )
+
 
 class API:  # pylint: disable=too-many-instance-attributes
     """Define the API object."""
 
-    def __init__(self, email: str, password: str, websession: ClientSession) -> None:
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        websession: ClientSession,
+        *,
+        circuit_breakers: Optional[CircuitBreakers] = None,
+        compact_devices: bool = False,
+        credential_store: Optional[Store] = None,
+        deduplicate_requests: bool = False,
+        keep_device_extras: bool = True,
+        limiter: Optional[RequestLimiter] = None,
+        metrics: Optional[MetricsHook] = None,
+        refresh_window: float = 0,
+        retry_policy: RetryPolicy = NO_RETRY,
+        token_refresh_margin: int = DEFAULT_TOKEN_REFRESH_MARGIN,
+        write_buffer_window: Optional[float] = None,
+    ) -> None:
         """Initialize."""
         self._api_base: str = API_BASE
+        self._auth_future: Optional[asyncio.Future] = None
+        self._circuit_breakers: Optional[CircuitBreakers] = circuit_breakers
+        self._credential_store: Optional[Store] = credential_store
+        self._deduplicate_requests: bool = deduplicate_requests
         self._email: str = email
+        self._inflight_requests: Dict[Tuple, asyncio.Future] = {}
+        self._limiter: Optional[RequestLimiter] = limiter
         self._password: str = password
-        self._retry_on_401: bool = False
+        self._refresh_handle: Optional[asyncio.TimerHandle] = None
         self._session: ClientSession = websession
+        self._shared_requests: "WeakSet[asyncio.Future]" = WeakSet()
         self._token: Optional[str] = None
-        self._token_expiration: Optional[datetime] = None
-        self.devices: DeviceDict = DeviceDict(self)
-        self.stations: StationDict = StationDict(self)
+        self._user_id: Optional[str] = None
+        self._token_expires_at: Optional[datetime] = None
+        # Monotonic deadline, so wall clock jumps don't affect expiry checks:
+        self._token_expiration: Optional[float] = None
+        self._token_refresh_margin: int = token_refresh_margin
+        self.deduplicated_endpoints: Set[str] = set(DEDUPLICATED_ENDPOINTS)
+        self.deduplicated_requests: int = 0
+        self.devices: DeviceDict = DeviceDict(
+            self, compact=compact_devices, keep_extras=keep_device_extras
+        )
+        self.metrics: MetricsHook = MetricsAggregator() if metrics is None else metrics
+        self.refresh_coordinator: RefreshCoordinator = RefreshCoordinator(
+            self.async_update_device_info, window=refresh_window
+        )
+        self.retries: int = 0
+        self.retry_policy: RetryPolicy = retry_policy
+        self.stations: StationDict = StationDict(
+            self, compact=compact_devices, keep_extras=keep_device_extras
+        )
+        self.write_buffer: Optional[ParamWriteBuffer] = None
+        if write_buffer_window is not None:
+            self.write_buffer = ParamWriteBuffer(
+                self._async_upload_params, window=write_buffer_window
+            )
 
     @property
-    def cameras(self) -> Dict[str, Device]:
+    def cameras(self) -> Dict[str, BaseDevice]:
         """Return a dictionary of cameras. Deprecated."""
         return {sn: device for sn, device in self.devices.items() if device.is_camera}
 
     async def async_authenticate(self) -> None:
-        """Authenticate and get an access token."""
-        auth_resp = await self.request(
-            "post",
-            "passport/login",
-            json={"email": self._email, "password": self._password},
-        )
+        """Authenticate and get an access token.
+
+        Concurrent callers share a single in-flight login.
+        """
+        if self._auth_future is None:
+            self._auth_future = asyncio.ensure_future(self._async_login())
+            self._auth_future.add_done_callback(self._auth_done)
+        await asyncio.shield(self._auth_future)
+
+    async def async_close(self) -> None:
+        """Upload buffered writes and cancel any scheduled background work.
+
+        Call this when the object is no longer needed.
+        """
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        if self.write_buffer:
+            await self.write_buffer.async_flush()
+
+    async def _async_login(self) -> None:
+        """Log in and store the returned access token."""
+        try:
+            auth_resp = await self.retry_policy.async_call(
+                lambda: self._async_send(
+                    "post",
+                    "passport/login",
+                    json={"email": self._email, "password": self._password},
+                ),
+                "passport/login",
+                on_retry=lambda err: self._count_retry("passport/login"),
+            )
+        except ClientResponseError as err:
+            if err.status == 401:
+                raise InvalidCredentialsError("Login was rejected") from None
+            raise RequestError(
+                f"There was an unknown error while logging in: {err}"
+            ) from None
+        except ClientError as err:
+            raise RequestError(
+                f"There was an unknown error while logging in: {err}"
+            ) from None
+
         data = auth_resp["data"]
 
-        self._retry_on_401 = False
         self._token = data["auth_token"]
-        self._token_expiration = datetime.fromtimestamp(data["token_expires_at"])
+        self._user_id = data.get("user_id")
+        self._set_token_expiration(data["token_expires_at"])
         domain = data.get("domain")
         if domain:
             self._api_base = f"https://{domain}/v1"
             _LOGGER.info("Switching to another API_BASE: %s", self._api_base)
 
+        if self._credential_store:
+            try:
+                await self._credential_store.async_save(
+                    self._email,
+                    {
+                        "api_base": self._api_base,
+                        "user_id": self._user_id,
+                        "auth_token": self._token,
+                        "token_expires_at": data["token_expires_at"],
+                    },
+                )
+            except OSError as err:
+                _LOGGER.warning("Unable to save credentials: %s", err)
+
+    async def async_restore_credentials(self) -> bool:
+        """Restore a still valid access token from the credential store.
+
+        Return whether a token was restored. A restored token that the API
+        rejects is replaced by a fresh login on first use.
+        """
+        if not self._credential_store:
+            return False
+
+        try:
+            data = await self._credential_store.async_load(self._email)
+        except OSError as err:
+            _LOGGER.warning("Unable to load credentials: %s", err)
+            return False
+
+        if not data:
+            return False
+
+        try:
+            api_base = data["api_base"]
+            token = data["auth_token"]
+            token_expires_at = data["token_expires_at"]
+            if token_expires_at <= time.time():
+                return False
+        except (KeyError, TypeError) as err:
+            _LOGGER.warning("Ignoring invalid stored credentials: %r", err)
+            return False
+
+        self._api_base = api_base
+        self._token = token
+        self._user_id = data.get("user_id")
+        self._set_token_expiration(token_expires_at)
+        self._schedule_token_refresh()
+        _LOGGER.info("Restored access token for %s", self._api_base)
+        return True
+
+    def _auth_done(self, future: asyncio.Future) -> None:
+        """Clear the in-flight login once it has finished."""
+        self._auth_future = None
+        if future.cancelled():
+            return
+        if future.exception():
+            _LOGGER.debug("Authentication failed: %s", future.exception())
+            return
+        self._schedule_token_refresh()
+
+    def _set_token_expiration(self, token_expires_at: int) -> None:
+        """Store the token expiry as both a datetime and a monotonic deadline."""
+        self._token_expires_at = datetime.fromtimestamp(token_expires_at)
+        self._token_expiration = time.monotonic() + (token_expires_at - time.time())
+
+    def _schedule_token_refresh(self) -> None:
+        """Schedule a background login shortly before the token expires."""
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+
+        if self._token_expiration is None:
+            return
+
+        remaining = self._token_expiration - time.monotonic()
+        # Never refresh in a tight loop when the token lifetime is shorter than
+        # the margin:
+        delay = max(remaining - self._token_refresh_margin, remaining / 2, 0)
+        # A weak reference, so the timer doesn't keep a discarded object alive:
+        self._refresh_handle = asyncio.get_event_loop().call_later(
+            delay, _refresh_token_in_background, ref(self)
+        )
+
+    def _refresh_token_in_background(self) -> None:
+        """Start a shared login without making any caller wait for it."""
+        self._refresh_handle = None
+        if self._auth_future is None:
+            _LOGGER.info("Access token about to expire; fetching a new one")
+            self._auth_future = asyncio.ensure_future(self._async_login())
+            self._auth_future.add_done_callback(self._auth_done)
+
+    async def _async_ensure_token(self) -> None:
+        """Make sure the access token is valid, refreshing it if needed."""
+        if self._token_expiration is None:
+            return
+
+        remaining = self._token_expiration - time.monotonic()
+        if remaining <= 0:
+            _LOGGER.info("Access token expired; fetching a new one")
+            await self.async_authenticate()
+        elif remaining <= self._token_refresh_margin:
+            self._refresh_token_in_background()
+
+    async def async_get_device_info(self, device: BaseDevice) -> dict:
+        """Get the latest info of a single device."""
+        resp = await self.request(
+            "post", "hub/get_dev_info", json=await self._async_device_query(device)
+        )
+        return resp["data"]
+
+    async def async_get_device_params(self, device: BaseDevice) -> List[dict]:
+        """Get the latest params of a single device."""
+        resp = await self.request(
+            "post", "hub/get_devs_params", json=await self._async_device_query(device)
+        )
+        return resp["data"]
+
+    async def _async_device_query(self, device: BaseDevice) -> dict:
+        """Return the body of a request about a single device."""
+        if self._user_id is None:
+            # Credentials restored from an older store don't know the account:
+            await self.async_authenticate()
+
+        return {
+            "account": self._user_id,
+            "device_sn": device.serial,
+            "station_sn": device.station_serial,
+        }
+
     async def async_get_history(self) -> dict:
         """Get the device's history."""
         history_resp = await self.request("post", "event/app/get_all_history_record")
         return history_resp["data"]
 
+    async def async_get_events(self) -> List[Event]:
+        """Get the device's history as events."""
+        return [Event(self, record) for record in await self.async_get_history()]
+
+    async def async_iter_events(self, **kwargs: Any) -> AsyncIterator[Event]:
+        """Yield history events like `async_iter_history` yields records."""
+        async for record in self.async_iter_history(**kwargs):
+            yield Event(self, record)
+
+    async def async_iter_history(
+        self,
+        *,
+        device_sn: str = "",
+        start_time: Union[datetime, int, None] = None,
+        end_time: Union[datetime, int, None] = None,
+        page_size: int = DEFAULT_HISTORY_PAGE_SIZE,
+    ) -> AsyncIterator[dict]:
+        """Yield history records, newest first, one page at a time.
+
+        The device and time filters are applied by the API. Times are datetimes
+        or epoch seconds.
+        """
+        cursor = 0
+        while True:
+            history_resp = await self.request(
+                "post",
+                "event/app/get_all_history_record",
+                json={
+                    "device_sn": device_sn,
+                    "end_time": _history_time(end_time),
+                    "id": cursor,
+                    "num": page_size,
+                    "pullup": True,
+                    "start_time": _history_time(start_time),
+                },
+            )
+            records = history_resp.get("data") or []
+            for record in records:
+                # Pages may start with the record the cursor points at:
+                if cursor and record["monitor_id"] >= cursor:
+                    continue
+                yield record
+
+            if len(records) < page_size:
+                return
+            next_cursor = records[-1]["monitor_id"]
+            if cursor and next_cursor >= cursor:
+                _LOGGER.debug("History cursor didn't move past %s", cursor)
+                return
+            cursor = next_cursor
+
     async def async_update_device_info(self) -> None:
         """Get the latest device info."""
-        devices_resp = await self.request("post", "app/get_devs_list")
-        self.devices.update(devices_resp["data"])
+        devices_resp, stations_resp = await asyncio.gather(
+            self.request("post", "app/get_devs_list"),
+            self.request("post", "app/get_hub_list"),
+            return_exceptions=True,
+        )
 
-        stations_resp = await self.request("post", "app/get_hub_list")
+        # Raise in the same order as the requests so errors don't depend on timing:
+        for resp in (devices_resp, stations_resp):
+            if isinstance(resp, BaseException):
+                raise resp
+
+        self.devices.update(devices_resp["data"])
         self.stations.update(stations_resp["data"])
 
-    async def async_set_params(self, device: Device, data: dict) -> None:
-        """Set device parameters."""
+    async def async_request_refresh(self) -> None:
+        """Get the latest device info, sharing a refresh with other callers."""
+        await self.refresh_coordinator.async_refresh()
+
+    async def async_set_params(
+        self, device: BaseDevice, data: dict, *, only_changed: bool = False
+    ) -> None:
+        """Set device parameters.
+
+        With `only_changed`, params that already hold the requested value are
+        left out, and nothing is uploaded when no param changed. When the write
+        buffer is enabled, the change is merged with other writes to the device
+        and only compared with the params when the merged writes are uploaded.
+        """
+        if self.write_buffer:
+            await self.write_buffer.async_set_params(
+                device, data, only_changed=only_changed
+            )
+            return
+
+        if only_changed:
+            data = device.params.changed(data)
+            if not data:
+                _LOGGER.debug("No params changed on %s; not uploading", device.serial)
+                return
+
+        await self._async_upload_params(device, data)
+
+    async def _async_upload_params(self, device: BaseDevice, data: dict) -> None:
+        """Upload device parameters."""
         params = Params()
         params.update(data)
-        serialized_params = [param.param_info for param in params]
+        serialized_params = [
+            {"param_type": param.type.value, **param.param_info} for param in params
+        ]
 
         if device.is_station:
             await self.request(
@@ -91,7 +454,50 @@ class API:  # pylint: disable=too-many-instance-attributes
                 },
             )
 
-    async def async_start_stream(self, device: Device) -> str:
+        device.apply_params(serialized_params)
+
+    async def async_set_params_bulk(
+        self,
+        device_params: Dict[BaseDevice, dict],
+        *,
+        concurrency: int = DEFAULT_BULK_CONCURRENCY,
+        only_changed: bool = False,
+    ) -> Dict[str, Optional[Exception]]:
+        """Set parameters on many devices.
+
+        Uploads for devices of the same station are sent one after the other;
+        up to `concurrency` stations are handled at once. Return the error for
+        each device serial, or None when its upload succeeded.
+        """
+        stations: Dict[str, List[Tuple[BaseDevice, dict]]] = {}
+        for device, data in device_params.items():
+            stations.setdefault(device.station_serial, []).append((device, data))
+
+        results: Dict[str, Optional[Exception]] = {}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def async_upload_station(uploads: List[Tuple[BaseDevice, dict]]) -> None:
+            """Upload the parameters of a station's devices in order."""
+            async with semaphore:
+                for device, data in uploads:
+                    try:
+                        await self.async_set_params(
+                            device, data, only_changed=only_changed
+                        )
+                    except Exception as err:  # pylint: disable=broad-except
+                        _LOGGER.debug(
+                            "Unable to set params on %s: %s", device.serial, err
+                        )
+                        results[device.serial] = err
+                    else:
+                        results[device.serial] = None
+
+        await asyncio.gather(
+            *[async_upload_station(uploads) for uploads in stations.values()]
+        )
+        return results
+
+    async def async_start_stream(self, device: BaseDevice) -> str:
         """Start the device stream and return the RTSP URL."""
         start_resp = await self.request(
             "post",
@@ -105,7 +511,7 @@ class API:  # pylint: disable=too-many-instance-attributes
 
         return start_resp["data"]["url"]
 
-    async def async_stop_stream(self, device: Device) -> None:
+    async def async_stop_stream(self, device: BaseDevice) -> None:
         """Stop the device stream."""
         await self.request(
             "post",
@@ -124,52 +530,219 @@ class API:  # pylint: disable=too-many-instance-attributes
         *,
         headers: Optional[dict] = None,
         json: Optional[dict] = None,
+        retry_safe: Optional[bool] = None,
     ) -> dict:
-        """Make a request the API.com."""
-        if self._token_expiration and datetime.now() >= self._token_expiration:
-            _LOGGER.info("Access token expired; fetching a new one")
-            self._token = None
-            self._token_expiration = None
+        """Make a request the API.com.
+
+        When request deduplication is enabled, identical concurrent requests to
+        an endpoint in `deduplicated_endpoints` share one response; each caller
+        then gets its own copy of it.
+        """
+        if (
+            not self._deduplicate_requests
+            or headers
+            or endpoint not in self.deduplicated_endpoints
+        ):
+            return await self._async_request(
+                method, endpoint, headers=headers, json=json, retry_safe=retry_safe
+            )
+
+        key = _request_key(method, endpoint, json)
+        future = self._inflight_requests.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._async_request(method, endpoint, json=json, retry_safe=retry_safe)
+            )
+            self._inflight_requests[key] = future
+            future.add_done_callback(lambda fut: self._request_done(key, fut))
+        else:
+            self.deduplicated_requests += 1
+            self._shared_requests.add(future)
+            _LOGGER.debug("Sharing in-flight request to %s", endpoint)
+        resp = await asyncio.shield(future)
+        if future in self._shared_requests:
+            return copy.deepcopy(resp)
+        return resp
+
+    def _request_done(self, key: Tuple, future: asyncio.Future) -> None:
+        """Forget an in-flight request once it has finished."""
+        if self._inflight_requests.get(key) is future:
+            del self._inflight_requests[key]
+        if not future.cancelled():
+            future.exception()
+
+    async def _async_request(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        headers: Optional[dict] = None,
+        json: Optional[dict] = None,
+        retry_safe: Optional[bool] = None,
+    ) -> dict:
+        """Make a request, retrying transient errors per the retry policy."""
+        try:
+            return await self.retry_policy.async_call(
+                lambda: self._async_attempt(
+                    method, endpoint, headers=headers, json=json
+                ),
+                endpoint,
+                safe=retry_safe,
+                on_retry=lambda err: self._count_retry(endpoint),
+            )
+        except ClientError as err:
+            raise RequestError(
+                f"There was an unknown error while requesting {endpoint}: {err}"
+            ) from None
+
+    async def _async_attempt(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        headers: Optional[dict] = None,
+        json: Optional[dict] = None,
+    ) -> dict:
+        """Make a request, logging in again if the token is rejected."""
+        await self._async_ensure_token()
+        token = self._token
+
+        try:
+            return await self._async_send(method, endpoint, headers=headers, json=json)
+        except ClientResponseError as err:
+            if err.status != 401:
+                raise
+
+        # Only log in again if nobody else has done so in the meantime:
+        self.metrics.record_reauth(endpoint)
+        if self._token == token:
             await self.async_authenticate()
 
+        try:
+            return await self._async_send(method, endpoint, headers=headers, json=json)
+        except ClientResponseError as err:
+            if err.status == 401:
+                raise InvalidCredentialsError("Token failed multiple times") from None
+            raise
+
+    def _count_retry(self, endpoint: str) -> None:
+        """Count a retried request."""
+        self.retries += 1
+        self.metrics.record_retry(endpoint)
+
+    async def _async_send(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        headers: Optional[dict] = None,
+        json: Optional[dict] = None,
+    ) -> dict:
+        """Send a single request and return the decoded response."""
+        if not self._circuit_breakers:
+            return await self._async_send_limited(
+                method, endpoint, headers=headers, json=json
+            )
+
+        breaker = self._circuit_breakers.get(self._api_base)
+        if breaker.acquire():
+            _LOGGER.info("Checking whether %s has recovered", self._api_base)
+            try:
+                await self._async_send_limited(
+                    "post", self._circuit_breakers.probe_endpoint
+                )
+            except asyncio.CancelledError:
+                breaker.abort_probe()
+                raise
+            except Exception as err:  # pylint: disable=broad-except
+                breaker.record(err, probe=True)
+                if breaker.state != STATE_CLOSED:
+                    raise CircuitOpenError(
+                        f"Requests to {self._api_base} are still failing: {err}"
+                    ) from None
+            else:
+                breaker.record(None, probe=True)
+
+        try:
+            data = await self._async_send_limited(
+                method, endpoint, headers=headers, json=json
+            )
+        except Exception as err:
+            breaker.record(err)
+            raise
+        breaker.record(None)
+        return data
+
+    async def _async_send_limited(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        headers: Optional[dict] = None,
+        json: Optional[dict] = None,
+    ) -> dict:
+        """Send a single request once the limiter allows it."""
+        if not self._limiter:
+            return await self._async_send_unlimited(
+                method, endpoint, headers=headers, json=json
+            )
+
+        async with self._limiter.limit(self._api_base, endpoint):
+            return await self._async_send_unlimited(
+                method, endpoint, headers=headers, json=json
+            )
+
+    async def _async_send_unlimited(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        headers: Optional[dict] = None,
+        json: Optional[dict] = None,
+    ) -> dict:
+        """Send a single request without waiting for the limiter."""
         url: str = f"{self._api_base}/{endpoint}"
 
-        if not headers:
-            headers = {}
+        headers = dict(headers or {})
         if self._token:
             headers["x-auth-token"] = self._token
 
-        async with self._session.request(
-            method, url, headers=headers, json=json
-        ) as resp:
-            try:
+        sample = RequestSample(method, endpoint, _body_size(json))
+        try:
+            async with self._session.request(
+                method, url, headers=headers, json=json, trace_request_ctx=sample
+            ) as resp:
+                sample.headers_received(resp.status)
                 resp.raise_for_status()
+                sample.body_read(len(await resp.read()))
                 data: dict = await resp.json(content_type=None)
+                sample.body_decoded()
 
-                if not data:
-                    raise RequestError(f"No response while requesting {endpoint}")
+            if not data:
+                raise RequestError(f"No response while requesting {endpoint}")
 
-                raise_error(data)
+            sample.code = data.get("code")
+            raise_error(data)
+        except Exception as err:
+            sample.finish(err)
+            raise
+        finally:
+            if sample.total is None:
+                sample.finish()
+            self.metrics.record(sample)
 
-                return data
-            except ClientError as err:
-                if "401" in str(err):
-                    if self._retry_on_401:
-                        raise InvalidCredentialsError("Token failed multiple times")
+        return data
 
-                    self._retry_on_401 = True
-                    await self.async_authenticate()
-                    return await self.request(
-                        method, endpoint, headers=headers, json=json
-                    )
-                raise RequestError(
-                    f"There was an unknown error while requesting {endpoint}: {err}"
-                ) from None
 
+async def async_login(
+    email: str, password: str, websession: ClientSession, **kwargs: Any
+) -> API:
+    """Return an authenticated API object.
 
-async def async_login(email: str, password: str, websession: ClientSession) -> API:
-    """Return an authenticated API object."""
-    api: API = API(email, password, websession)
-    await api.async_authenticate()
+    Extra keyword arguments are passed on to `API`.
+    """
+    api: API = API(email, password, websession, **kwargs)
+    if not await api.async_restore_credentials():
+        await api.async_authenticate()
     await api.async_update_device_info()
     return api
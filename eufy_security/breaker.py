@@ -0,0 +1,173 @@
+"""Define circuit breakers that fail fast while an API server is failing."""
+from collections import deque
+import logging
+import time
+from typing import Any, Deque, Dict, Optional
+
+from aiohttp.client_exceptions import ClientConnectionError
+
+from .errors import CircuitOpenError, ConnectError, NetworkError
+from .limiter import is_overload
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+STATE_CLOSED: str = "closed"
+STATE_HALF_OPEN: str = "half_open"
+STATE_OPEN: str = "open"
+
+# A cheap request used to check whether a failing server has recovered:
+DEFAULT_PROBE_ENDPOINT: str = "app/get_hub_list"
+
+
+def is_failure(err: Optional[BaseException]) -> bool:
+    """Return whether the error means the server is unhealthy."""
+    return is_overload(err) or isinstance(
+        err, (ClientConnectionError, ConnectError, NetworkError)
+    )
+
+
+class CircuitBreaker:  # pylint: disable=too-many-instance-attributes
+    """Define a circuit breaker for a single API server.
+
+    The circuit opens after `failure_threshold` consecutive failures, or when at
+    least `error_rate` of the last `window` requests failed (once `min_calls`
+    requests have been seen). After `recovery_timeout` seconds it becomes
+    half-open: a single probe request decides whether it closes or opens again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        error_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        recovery_timeout: float = 30,
+    ) -> None:
+        """Initialize."""
+        self._opened_at: Optional[float] = None
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._probing: bool = False
+        self.consecutive_failures: int = 0
+        self.error_rate: float = error_rate
+        self.failure_threshold: int = failure_threshold
+        self.min_calls: int = min_calls
+        self.name: str = name
+        self.opened: int = 0
+        self.recovery_timeout: float = recovery_timeout
+        self.rejected: int = 0
+
+    @property
+    def state(self) -> str:
+        """Return the state of the circuit."""
+        if self._opened_at is None:
+            return STATE_CLOSED
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return STATE_HALF_OPEN
+        return STATE_OPEN
+
+    def acquire(self) -> bool:
+        """Check whether a request may go out.
+
+        Return True when the caller has to send a probe request first; raise
+        CircuitOpenError when the request should fail fast.
+        """
+        state = self.state
+        if state == STATE_CLOSED:
+            return False
+        if state == STATE_HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(f"Requests to {self.name} are failing; not trying")
+
+    def abort_probe(self) -> None:
+        """Allow another probe after one was abandoned without an outcome."""
+        self._probing = False
+
+    def record(self, err: Optional[BaseException], *, probe: bool = False) -> None:
+        """Record the outcome of a request.
+
+        Pass `probe` for the outcome of the probe request `acquire` asked for.
+        While the circuit isn't closed, only the probe outcome counts: other
+        requests may have started before the circuit opened.
+        """
+        failed = is_failure(err)
+
+        if probe:
+            if not self._probing:
+                return
+            self._probing = False
+            self._outcomes.append(failed)
+            if failed:
+                self._open()
+            else:
+                _LOGGER.info("Closing circuit for %s", self.name)
+                self._opened_at = None
+                self._outcomes.clear()
+                self.consecutive_failures = 0
+            return
+
+        if self._opened_at is not None:
+            return
+
+        self._outcomes.append(failed)
+        if not failed:
+            self.consecutive_failures = 0
+            return
+
+        self.consecutive_failures += 1
+        failures = sum(self._outcomes)
+        if self.consecutive_failures >= self.failure_threshold or (
+            len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.error_rate
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        """Open the circuit."""
+        _LOGGER.warning("Opening circuit for %s", self.name)
+        self._opened_at = time.monotonic()
+        self.opened += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of the circuit breaker."""
+        return {
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": (
+                sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0
+            ),
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "state": self.state,
+        }
+
+
+class CircuitBreakers:
+    """Define a circuit breaker per API server.
+
+    Share one instance between API objects so every account benefits from what
+    the others learn about a server.
+    """
+
+    def __init__(self, *, probe_endpoint: str = DEFAULT_PROBE_ENDPOINT, **kwargs: Any):
+        """Initialize.
+
+        The keyword arguments configure each `CircuitBreaker`.
+        """
+        self._breaker_kwargs: Dict[str, Any] = kwargs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.probe_endpoint: str = probe_endpoint
+
+    def get(self, api_base: str) -> CircuitBreaker:
+        """Return the circuit breaker for the API server."""
+        if api_base not in self._breakers:
+            self._breakers[api_base] = CircuitBreaker(api_base, **self._breaker_kwargs)
+        return self._breakers[api_base]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return the state of every circuit breaker."""
+        return {
+            api_base: breaker.snapshot() for api_base, breaker in self._breakers.items()
+        }
@@ -0,0 +1,134 @@
+"""Define a buffer that merges parameter writes before uploading them."""
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Set
+
+from .types import ParamType
+
+if TYPE_CHECKING:
+    from .device import BaseDevice  # pylint: disable=cyclic-import
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class _PendingWrite:
+    """Define the merged param changes waiting to be uploaded for a device."""
+
+    def __init__(self, handle: asyncio.TimerHandle, future: asyncio.Future) -> None:
+        """Initialize."""
+        self.data: Dict[ParamType, Any] = {}
+        self.forced: Set[ParamType] = set()
+        self.future: asyncio.Future = future
+        self.handle: asyncio.TimerHandle = handle
+
+
+class ParamWriteBuffer:
+    """Define a buffer that merges param writes per device.
+
+    Writes to a device made within `window` seconds of its first pending write
+    are uploaded together; later values for a param replace earlier ones. Each
+    caller waits for the upload that includes its change, and uploads for a
+    device never overlap.
+
+    Writes made with `only_changed` are compared with the device params when
+    the merged writes are uploaded, so a later value always wins over an
+    earlier one that is still pending.
+    """
+
+    def __init__(
+        self,
+        upload: Callable[["BaseDevice", Dict[ParamType, Any]], Awaitable[None]],
+        *,
+        window: float = 0.1,
+    ) -> None:
+        """Initialize."""
+        self._flushing: Dict["BaseDevice", asyncio.Future] = {}
+        self._pending: Dict["BaseDevice", _PendingWrite] = {}
+        self._upload = upload
+        self.flushes: int = 0
+        self.window: float = window
+        self.writes: int = 0
+
+    async def async_set_params(
+        self, device: "BaseDevice", data: Dict[Any, Any], *, only_changed: bool = False
+    ) -> None:
+        """Queue param changes and wait until they are uploaded."""
+        self.writes += 1
+        pending = self._pending.get(device)
+        if pending is None:
+            loop = asyncio.get_event_loop()
+            future = loop.create_future()
+            future.add_done_callback(_retrieve_exception)
+            handle = loop.call_later(
+                self.window, lambda: asyncio.ensure_future(self._async_flush(device))
+            )
+            pending = self._pending[device] = _PendingWrite(handle, future)
+
+        for key, value in data.items():
+            param_type = ParamType.lookup(key)
+            pending.data[param_type] = value
+            if only_changed:
+                pending.forced.discard(param_type)
+            else:
+                pending.forced.add(param_type)
+
+        await asyncio.shield(pending.future)
+
+    async def async_flush(self) -> None:
+        """Upload every pending write now."""
+        devices = list(self._pending)
+        for device in devices:
+            self._pending[device].handle.cancel()
+        await asyncio.gather(
+            *[self._async_flush(device) for device in devices], return_exceptions=True
+        )
+
+    async def _async_flush(self, device: "BaseDevice") -> None:
+        """Upload the pending writes of a device."""
+        pending = self._pending.pop(device, None)
+        if pending is None:
+            return
+
+        previous: Optional[asyncio.Future] = self._flushing.get(device)
+        self._flushing[device] = pending.future
+        try:
+            if previous and not previous.done():
+                await asyncio.wait([previous])
+
+            # Compared only now, after the previous upload updated the params:
+            data = {
+                param_type: value
+                for param_type, value in pending.data.items()
+                if param_type in pending.forced
+            }
+            unforced = {
+                param_type: value
+                for param_type, value in pending.data.items()
+                if param_type not in pending.forced
+            }
+            if unforced:
+                data.update(device.params.changed(unforced))
+            if data:
+                self.flushes += 1
+                _LOGGER.debug(
+                    "Uploading %s buffered params for %s", len(data), device.serial
+                )
+                await self._upload(device, data)
+            else:
+                _LOGGER.debug("No params changed on %s; not uploading", device.serial)
+        except Exception as err:  # pylint: disable=broad-except
+            pending.future.set_exception(err)
+        else:
+            pending.future.set_result(None)
+        finally:
+            # A cancelled upload must not leave its callers waiting:
+            if not pending.future.done():
+                pending.future.cancel()
+            if self._flushing.get(device) is pending.future:
+                del self._flushing[device]
+
+
+def _retrieve_exception(future: asyncio.Future) -> None:
+    """Mark a failed upload as handled when all of its callers went away."""
+    if not future.cancelled():
+        future.exception()
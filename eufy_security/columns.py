@@ -0,0 +1,188 @@
+"""Define a columnar form of history records."""
+from array import array
+import json
+import logging
+import mmap
+import struct
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .events import Event
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# Columns with their array type codes; serials are stored as dictionary codes:
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("monitor_id", "q"),
+    ("start_time", "q"),
+    ("end_time", "q"),
+    ("frame_num", "i"),
+    ("has_human", "b"),
+    ("storage_type", "b"),
+    ("device_type", "i"),
+    ("device", "i"),
+    ("station", "i"),
+)
+
+# Stands in for missing values:
+MISSING: int = -1
+
+_MAGIC: bytes = b"EUFYCOL1"
+_HEADER_SIZE = struct.Struct("<Q")
+_ALIGNMENT: int = 8
+
+
+def _field(record: Union[dict, Event], key: str) -> Any:
+    """Return a field of a history record or event."""
+    if isinstance(record, Event):
+        return getattr(record, key)
+    return record.get(key)
+
+
+class HistoryColumns:
+    """Define history records as one array per field.
+
+    `device` and `station` hold indexes into `device_sns` and `station_sns`.
+    Missing values are `MISSING`. Columns read with `load` are memory-mapped
+    memoryviews until `close` is called.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._codes: Dict[str, Dict[str, int]] = {"device": {}, "station": {}}
+        self._mmap: Optional[mmap.mmap] = None
+        self.columns: Dict[str, Sequence[int]] = {
+            name: array(typecode) for name, typecode in COLUMNS
+        }
+        self.device_sns: List[str] = []
+        self.station_sns: List[str] = []
+
+    def __len__(self) -> int:
+        """Return the number of records."""
+        return len(self.columns["monitor_id"])
+
+    def __getitem__(self, name: str) -> Sequence[int]:
+        """Return a column."""
+        return self.columns[name]
+
+    @classmethod
+    def from_records(cls, records: Iterable[Union[dict, Event]]) -> "HistoryColumns":
+        """Create columns from history records or events."""
+        columns = cls()
+        columns.extend(records)
+        return columns
+
+    def _encode(self, kind: str, serials: List[str], serial: Optional[str]) -> int:
+        """Return the dictionary code of a serial, adding it if it is new."""
+        if not serial:
+            return MISSING
+        codes = self._codes[kind]
+        code = codes.get(serial)
+        if code is None:
+            code = codes[serial] = len(serials)
+            serials.append(serial)
+        return code
+
+    def extend(self, records: Iterable[Union[dict, Event]]) -> None:
+        """Append history records or events."""
+        if self._mmap is not None:
+            raise ValueError("Memory-mapped columns are read-only")
+
+        columns = self.columns
+        for record in records:
+            for name, _ in COLUMNS[:-2]:
+                value = _field(record, name)
+                columns[name].append(  # type: ignore
+                    MISSING if value is None else int(value)
+                )
+            columns["device"].append(  # type: ignore
+                self._encode("device", self.device_sns, _field(record, "device_sn"))
+            )
+            columns["station"].append(  # type: ignore
+                self._encode("station", self.station_sns, _field(record, "station_sn"))
+            )
+
+    def to_numpy(self) -> Any:
+        """Return the columns as a NumPy structured array.
+
+        NumPy is only needed for this method.
+        """
+        import numpy  # pylint: disable=import-outside-toplevel
+
+        result = numpy.empty(
+            len(self),
+            dtype=[(name, numpy.dtype(typecode)) for name, typecode in COLUMNS],
+        )
+        for name, typecode in COLUMNS:
+            result[name] = numpy.frombuffer(self.columns[name], dtype=typecode)
+        return result
+
+    def save(self, path: str) -> None:
+        """Write the columns to a file that `load` can memory-map."""
+        header = {
+            "byteorder": sys.byteorder,
+            "columns": [],
+            "device_sns": self.device_sns,
+            "length": len(self),
+            "station_sns": self.station_sns,
+        }
+        offset = 0
+        for name, typecode in COLUMNS:
+            header["columns"].append([name, typecode, offset])
+            size = len(self) * array(typecode).itemsize
+            offset += size + -size % _ALIGNMENT
+        encoded = json.dumps(header).encode()
+        encoded += b" " * (-(len(_MAGIC) + _HEADER_SIZE.size + len(encoded)) % 8)
+
+        with open(path, "wb") as fptr:
+            fptr.write(_MAGIC)
+            fptr.write(_HEADER_SIZE.pack(len(encoded)))
+            fptr.write(encoded)
+            for name, _ in COLUMNS:
+                data = memoryview(self.columns[name]).cast("B")  # type: ignore
+                fptr.write(data)
+                fptr.write(b"\0" * (-len(data) % _ALIGNMENT))
+
+    @classmethod
+    def load(cls, path: str) -> "HistoryColumns":
+        """Memory-map columns written by `save`."""
+        with open(path, "rb") as fptr:
+            mapped = mmap.mmap(fptr.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if mapped[: len(_MAGIC)] != _MAGIC:
+                raise ValueError(f"Not a history columns file: {path}")
+            (header_size,) = _HEADER_SIZE.unpack_from(mapped, len(_MAGIC))
+            start = len(_MAGIC) + _HEADER_SIZE.size
+            header = json.loads(mapped[start : start + header_size])
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"History columns file has another byte order: {path}")
+        except BaseException:
+            mapped.close()
+            raise
+
+        columns = cls()
+        columns._mmap = mapped
+        columns.device_sns = header["device_sns"]
+        columns.station_sns = header["station_sns"]
+        columns._codes = {
+            "device": {serial: code for code, serial in enumerate(columns.device_sns)},
+            "station": {
+                serial: code for code, serial in enumerate(columns.station_sns)
+            },
+        }
+        data = memoryview(mapped)[start + header_size :]
+        for name, typecode, offset in header["columns"]:
+            size = header["length"] * array(typecode).itemsize
+            columns.columns[name] = data[offset : offset + size].cast(typecode)
+        return columns
+
+    def close(self) -> None:
+        """Release memory-mapped columns."""
+        if self._mmap is None:
+            return
+        for column in self.columns.values():
+            column.release()  # type: ignore
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS}
+        self._mmap.close()
+        self._mmap = None
@@ -0,0 +1,50 @@
+"""Define a coordinator that coalesces device info refreshes."""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class RefreshCoordinator:
+    """Define an object that shares one refresh between many callers."""
+
+    def __init__(
+        self, refresh: Callable[[], Awaitable[None]], *, window: float = 0
+    ) -> None:
+        """Initialize."""
+        self._future: Optional[asyncio.Future] = None
+        self._refresh: Callable[[], Awaitable[None]] = refresh
+        self.performed: int = 0
+        self.requested: int = 0
+        self.window: float = window
+
+    @property
+    def saved(self) -> int:
+        """Return how many refreshes were avoided by sharing."""
+        return self.requested - self.performed
+
+    async def async_refresh(self) -> None:
+        """Request a refresh and wait for the one that serves this request.
+
+        A refresh waits `window` seconds before it starts; every caller that
+        arrives before it has finished shares its result.
+        """
+        self.requested += 1
+        if self._future is None:
+            self._future = asyncio.ensure_future(self._async_run())
+            self._future.add_done_callback(self._done)
+        await asyncio.shield(self._future)
+
+    async def _async_run(self) -> None:
+        """Wait for the debounce window, then refresh."""
+        if self.window:
+            await asyncio.sleep(self.window)
+        self.performed += 1
+        await self._refresh()
+
+    def _done(self, future: asyncio.Future) -> None:
+        """Clear the in-flight refresh once it has finished."""
+        self._future = None
+        if not future.cancelled() and future.exception():
+            _LOGGER.debug("Refresh failed: %s", future.exception())
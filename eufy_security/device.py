@@ -1,6 +1,17 @@
 """Define a Eufy device object."""
 import logging
-from typing import TYPE_CHECKING
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from .param import Params
 from .types import DeviceType, ParamType
@@ -10,26 +21,218 @@ if TYPE_CHECKING:
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
-
-class Device:
-    """Define the device object."""
+# Device info keys that compact devices keep in slots:
+COMPACT_FIELDS: Tuple[str, ...] = (
+    "cover_path",
+    "device_model",
+    "device_name",
+    "device_sn",
+    "device_type",
+    "main_hw_version",
+    "main_sw_version",
+    "params",
+    "station_model",
+    "station_name",
+    "station_sn",
+    "wifi_mac",
+)
+
+_COMPACT_SLOTS: Dict[str, str] = {key: f"_info_{key}" for key in COMPACT_FIELDS}
+
+# Param info keys of packed params, so equal keys are only kept once:
+_PARAM_KEYS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+# Marks a device info value that doesn't exist:
+_MISSING = object()
+
+# Marks a device info value that must exist:
+_REQUIRED = object()
+
+
+class DeviceChanges(NamedTuple):
+    """Define the changes a device dictionary update made.
+
+    `fields` has the changed device info keys and `params` the changed param
+    types of each changed device.
+    """
+
+    generation: int
+    added: Set[str]
+    removed: Set[str]
+    changed: Set[str]
+    fields: Dict[str, List[str]]
+    params: Dict[str, Set[int]]
+
+
+def diff_params(
+    old_param_infos: List[Dict[str, Any]], new_param_infos: List[Dict[str, Any]]
+) -> Set[int]:
+    """Return the types of params that were added, removed or changed."""
+    old = {param_info["param_type"]: param_info for param_info in old_param_infos}
+    new = {param_info["param_type"]: param_info for param_info in new_param_infos}
+    return {
+        param_type
+        for param_type in old.keys() | new.keys()
+        if old.get(param_type) != new.get(param_type)
+    }
+
+
+def pack_params(
+    param_infos: List[Dict[str, Any]]
+) -> Tuple[Tuple[Tuple[str, ...], Tuple[Any, ...]], ...]:
+    """Return params as pairs of key and value tuples.
+
+    Equal key tuples are shared by all devices and equal strings by the params
+    of a device, like the serial every param repeats.
+    """
+    strings: Dict[str, str] = {}
+    packed = []
+    for param_info in param_infos:
+        keys = tuple(param_info)
+        values = tuple(
+            strings.setdefault(value, value) if isinstance(value, str) else value
+            for value in param_info.values()
+        )
+        packed.append((_PARAM_KEYS.setdefault(keys, keys), values))
+    return tuple(packed)
+
+
+def unpack_params(
+    packed: Tuple[Tuple[Tuple[str, ...], Tuple[Any, ...]], ...]
+) -> List[Dict[str, Any]]:
+    """Return params packed by `pack_params` as param infos."""
+    return [dict(zip(keys, values)) for keys, values in packed]
+
+
+class BaseDevice:
+    """Define the behaviour shared by devices and compact devices.
+
+    Subclasses keep the device info and implement the hooks that read and
+    write it.
+    """
+
+    __slots__ = ("__weakref__", "_api", "_params", "_type", "pending_params")
 
     def __init__(self, api: "API", device_info: dict) -> None:
         """Initialize."""
         self._api = api
-        self.device_info = {}
+        self._params: Optional[Params] = None
+        self._type: Optional[DeviceType] = None
+        self.pending_params: Dict[ParamType, str] = {}
         self.update(device_info)
 
-    def update(self, device_info: dict) -> None:
-        """Update the device's info."""
-        if isinstance(device_info, Device):
+    def update(self, device_info: dict) -> List[str]:
+        """Update the device's info and return the keys whose values changed.
+
+        Device info without changes is skipped.
+        """
+        if isinstance(device_info, BaseDevice):
             device_info = device_info.device_info
-        self.device_info.update(device_info)
+        changed = self._changed_keys(device_info)
+        if "params" in device_info and self.pending_params:
+            self._confirm_params(device_info["params"])
+        if not changed:
+            return changed
+        if "device_type" in changed:
+            self._type = None
+        if "params" in changed:
+            self._params = None
+        self._update_info(device_info)
+        return changed
+
+    def _changed_keys(self, device_info: dict) -> List[str]:
+        """Return the keys of the device info whose values differ."""
+        raise NotImplementedError
+
+    def _get(self, key: str, default: Any = _REQUIRED) -> Any:
+        """Return a value of the device info."""
+        raise NotImplementedError
+
+    def _set(self, key: str, value: Any) -> None:
+        """Set a value of the device info."""
+        raise NotImplementedError
+
+    def _update_info(self, device_info: dict) -> None:
+        """Merge values into the device info."""
+        raise NotImplementedError
+
+    def apply_params(self, param_infos: List[Dict[str, Any]]) -> None:
+        """Apply successfully uploaded params to the local device info.
+
+        The values stay in `pending_params` until params read back from the
+        API confirm them.
+        """
+        now = int(time.time())
+        params = self._get("params", None)
+        if params is None:
+            params = []
+            self._set("params", params)
+        existing = {param_info["param_type"]: param_info for param_info in params}
+
+        for param_info in param_infos:
+            param_type = param_info["param_type"]
+            param_value = param_info["param_value"]
+            if param_type in existing:
+                existing[param_type]["param_value"] = param_value
+                existing[param_type]["update_time"] = now
+            else:
+                params.append(
+                    {
+                        "param_type": param_type,
+                        "param_value": param_value,
+                        "create_time": now,
+                        "update_time": now,
+                    }
+                )
+            self.pending_params[ParamType.lookup(param_type)] = param_value
+        self._set("params", params)
+        self._params = None
+
+    def update_params(self, param_infos: List[Dict[str, Any]]) -> None:
+        """Merge params read back from the API into the device info.
+
+        Params of other types are kept as they are.
+        """
+        if self.pending_params:
+            self._confirm_params(param_infos)
+
+        params = {
+            param_info["param_type"]: param_info
+            for param_info in self._get("params", [])
+        }
+        for param_info in param_infos:
+            params[param_info["param_type"]] = param_info
+        self._set("params", list(params.values()))
+        self._params = None
+
+    def _confirm_params(self, param_infos: List[Dict[str, Any]]) -> None:
+        """Resolve pending params with values read back from the API.
+
+        Values read back from the API always win over pending ones.
+        """
+        values = {
+            param_info["param_type"]: param_info["param_value"]
+            for param_info in param_infos
+        }
+        for param_type, param_value in list(self.pending_params.items()):
+            if param_type.value not in values:
+                continue
+            if values[param_type.value] != param_value:
+                _LOGGER.debug(
+                    "%s of %s is %s rather than the pending %s",
+                    param_type.name,
+                    self.serial,
+                    values[param_type.value],
+                    param_value,
+                )
+            del self.pending_params[param_type]
 
     @property
     def type(self) -> DeviceType:
         """Return the device's type."""
-        return DeviceType(self.device_info["device_type"])
+        if self._type is None:
+            self._type = DeviceType(self._get("device_type"))
+        return self._type
 
     @property
     def is_camera(self) -> bool:
@@ -54,51 +257,80 @@ class Device:
     @property
     def serial(self) -> str:
         """Return the device's serial number."""
-        return self.device_info["device_sn"]
+        return self._get("device_sn")
 
     @property
     def station_serial(self) -> str:
         """Return the device's station serial number."""
-        return self.device_info["station_sn"]
+        return self._get("station_sn")
 
     @property
     def software_version(self) -> str:
         """Return the device's software version."""
-        return self.device_info["main_sw_version"]
+        return self._get("main_sw_version")
 
     @property
     def hardware_version(self) -> str:
         """Return the device's hardware version."""
-        return self.device_info["main_hw_version"]
+        return self._get("main_hw_version")
 
     @property
     def last_camera_image_url(self) -> str:
         """Return the URL to the latest device thumbnail."""
-        return self.device_info["cover_path"]
+        return self._get("cover_path")
 
     @property
     def mac(self) -> str:
         """Return the device MAC address."""
-        return self.device_info["wifi_mac"]
+        return self._get("wifi_mac")
 
     @property
     def model(self) -> str:
         """Return the device's model."""
-        return self.device_info["device_model"]
+        return self._get("device_model")
 
     @property
     def name(self) -> str:
         """Return the device name."""
-        return self.device_info["device_name"]
+        return self._get("device_name")
 
     @property
     def params(self) -> Params:
-        """Return device parameters."""
-        return Params(self.device_info["params"])
-
-    async def async_set_params(self, params: dict) -> None:
+        """Return device parameters.
+
+        The params are cached until the device info changes them, so treat them
+        as read-only and use `async_set_params` to change them.
+        """
+        if self._params is None:
+            self._params = Params(self._get("params"))
+        return self._params
+
+    async def async_refresh(self) -> None:
+        """Get the latest info of this device only."""
+        self.update(await self._api.async_get_device_info(self))
+
+    async def async_refresh_params(
+        self, param_types: Optional[Iterable] = None
+    ) -> None:
+        """Get the latest params of this device only.
+
+        When param types are given, only those params are updated.
+        """
+        param_infos = await self._api.async_get_device_params(self)
+        if param_types is not None:
+            values = {ParamType.lookup(param_type).value for param_type in param_types}
+            param_infos = [
+                param_info
+                for param_info in param_infos
+                if param_info["param_type"] in values
+            ]
+        self.update_params(param_infos)
+
+    async def async_set_params(
+        self, params: dict, *, only_changed: bool = False
+    ) -> None:
         """Set device parameters."""
-        await self._api.async_set_params(self, params)
+        await self._api.async_set_params(self, params, only_changed=only_changed)
 
     async def async_start_detection(self):
         """Start device detection."""
@@ -118,42 +350,206 @@ class Device:
 
     async def async_update(self) -> None:
         """Get the latest values for the device's properties."""
-        await self._api.async_update_device_info()
+        await self._api.async_request_refresh()
+
+
+class Device(BaseDevice):
+    """Define the device object."""
+
+    def __init__(self, api: "API", device_info: dict) -> None:
+        """Initialize."""
+        self.device_info: dict = {}
+        super().__init__(api, device_info)
+
+    def _changed_keys(self, device_info: dict) -> List[str]:
+        """Return the keys of the device info whose values differ."""
+        if device_info == self.device_info:
+            # Comparing whole dictionaries is much faster when nothing changed
+            return []
+        return [
+            key
+            for key, value in device_info.items()
+            if self._get(key, _MISSING) != value
+        ]
+
+    def _get(self, key: str, default: Any = _REQUIRED) -> Any:
+        """Return a value of the device info."""
+        if default is _REQUIRED:
+            return self.device_info[key]
+        return self.device_info.get(key, default)
+
+    def _set(self, key: str, value: Any) -> None:
+        """Set a value of the device info."""
+        self.device_info[key] = value
+
+    def _update_info(self, device_info: dict) -> None:
+        """Merge values into the device info."""
+        self.device_info.update(device_info)
+
+
+class CompactDevice(BaseDevice):
+    """Define a device object that keeps its info in slots.
+
+    Only the device info used by properties is parsed into slots, and params
+    are packed into tuples. Other values are kept in a dictionary that is only
+    created when needed, or dropped when `keep_extras` is false.
+    """
+
+    __slots__ = ("_extras", "_keep_extras", *_COMPACT_SLOTS.values())
+
+    def __init__(
+        self, api: "API", device_info: dict, *, keep_extras: bool = True
+    ) -> None:
+        """Initialize."""
+        self._extras: Optional[Dict[str, Any]] = None
+        self._keep_extras = keep_extras
+        super().__init__(api, device_info)
+
+    @property  # type: ignore
+    def device_info(self) -> dict:  # type: ignore
+        """Return a copy of the device info that was kept."""
+        device_info = {}
+        for key in _COMPACT_SLOTS:
+            value = self._get(key, _MISSING)
+            if value is not _MISSING:
+                device_info[key] = value
+        if self._extras is not None:
+            device_info.update(self._extras)
+        return device_info
+
+    def _get(self, key: str, default: Any = _REQUIRED) -> Any:
+        """Return a value of the device info."""
+        try:
+            slot = _COMPACT_SLOTS[key]
+        except KeyError:
+            if self._extras is not None and key in self._extras:
+                return self._extras[key]
+        else:
+            try:
+                value = getattr(self, slot)
+            except AttributeError:
+                pass
+            else:
+                return unpack_params(value) if key == "params" else value
+        if default is _REQUIRED:
+            raise KeyError(key)
+        return default
+
+    def _changed_keys(self, device_info: dict) -> List[str]:
+        """Return the keys of the device info whose values differ."""
+        extras = self._extras or {}
+        changed = []
+        for key, value in device_info.items():
+            if key in _COMPACT_SLOTS:
+                if self._get(key, _MISSING) != value:
+                    changed.append(key)
+            elif self._keep_extras and extras.get(key, _MISSING) != value:
+                changed.append(key)
+        return changed
+
+    def _set(self, key: str, value: Any) -> None:
+        """Set a value of the device info."""
+        if key == "params":
+            value = pack_params(value)
+        try:
+            setattr(self, _COMPACT_SLOTS[key], value)
+        except KeyError:
+            if not self._keep_extras:
+                return
+            if self._extras is None:
+                self._extras = {}
+            self._extras[key] = value
+
+    def _update_info(self, device_info: dict) -> None:
+        """Merge values into the device info."""
+        for key, value in device_info.items():
+            self._set(key, value)
 
 
 class DeviceDict(dict):
     """A dictionary of devices."""
 
     _cls = Device
+    _compact_cls = CompactDevice
+    _serial_key = "device_sn"
 
-    def __init__(self, api: "API"):
-        """Initialize DeviceDict."""
-        self._api = api
+    def __init__(
+        self, api: "API", *, compact: bool = False, keep_extras: bool = True
+    ) -> None:
+        """Initialize DeviceDict.
 
-    def update(self, device_infos):
-        """Update devices from a list of dictionary."""
+        With `compact`, devices are created as compact devices that keep or drop
+        the device info their properties don't use depending on `keep_extras`.
+        """
+        self._api = api
+        self._compact = compact
+        self._keep_extras = keep_extras
+        self.changes: Optional[DeviceChanges] = None
+        self.generation: int = 0
+
+    def _create(self, device_info: dict) -> BaseDevice:
+        """Create a device from the device info."""
+        if self._compact:
+            return self._compact_cls(
+                self._api, device_info, keep_extras=self._keep_extras
+            )
+        return self._cls(self._api, device_info)
+
+    def update(self, device_infos) -> DeviceChanges:  # type: ignore
+        """Update devices and return what changed.
+
+        A list is the full list of devices, so devices missing from it are
+        removed. A dictionary of device infos by serial only adds or updates
+        devices.
+        """
         if type(device_infos) == list:
-            devices = {}
-            for device_info in device_infos:
-                device = self._cls(self._api, device_info)
-                devices[device.serial] = device
-            device_infos = devices
-
-        if type(device_infos) != dict:
+            device_infos = {
+                device_info[self._serial_key]: device_info
+                for device_info in device_infos
+            }
+            removed = set(self) - device_infos.keys()
+        elif type(device_infos) == dict:
+            removed = set()
+        else:
             raise TypeError(type(device_infos))
 
+        added = set()
+        changed = set()
+        fields = {}
+        params = {}
+        # pylint: disable=protected-access
         for key, device_info in device_infos.items():
             if key in self:
-                self[key].update(device_info)
+                device = self[key]
+                param_infos = device._get("params", [])
+                changed_fields = device.update(device_info)
+                if not changed_fields:
+                    continue
+                changed.add(key)
+                fields[key] = changed_fields
+                if "params" in changed_fields:
+                    params[key] = diff_params(param_infos, device._get("params"))
             else:
-                device = self._cls(self._api, device_info)
+                device = self._create(device_info)
                 if device.serial != key:
                     raise KeyError(key)
                 self[key] = device
+                added.add(key)
 
+        for key in removed:
+            del self[key]
+
+        self.generation += 1
+        self.changes = DeviceChanges(
+            self.generation, added, removed, changed, fields, params
+        )
+        return self.changes
 
-class Station(Device):
-    """Define the station object."""
+
+class BaseStation(BaseDevice):
+    """Define the behaviour shared by stations and compact stations."""
+
+    __slots__ = ()
 
     @property
     def serial(self) -> str:
@@ -163,15 +559,27 @@ class Station(Device):
     @property
     def model(self) -> str:
         """Return the station's model."""
-        return self.device_info["station_model"]
+        return self._get("station_model")
 
     @property
     def name(self) -> str:
         """Return the station name."""
-        return self.device_info["station_name"]
+        return self._get("station_name")
+
+
+class Station(BaseStation, Device):
+    """Define the station object."""
+
+
+class CompactStation(CompactDevice, BaseStation):
+    """Define a station object that keeps its info in slots."""
+
+    __slots__ = ()
 
 
 class StationDict(DeviceDict):
     """A dictionary of stations."""
 
     _cls = Station
+    _compact_cls = CompactStation
+    _serial_key = "station_sn"
@@ -8,6 +8,12 @@ class EufySecurityError(Exception):
     pass
 
 
+class CircuitOpenError(EufySecurityError):
+    """Define an error for requests rejected while an API server is failing."""
+
+    pass
+
+
 class ConnectError(EufySecurityError):
     """Connection error."""
 
@@ -0,0 +1,280 @@
+"""Define history events and a local store for history records."""
+import asyncio
+from datetime import datetime, timezone
+import json
+import logging
+import sqlite3
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .api import API  # pylint: disable=cyclic-import
+    from .device import BaseDevice  # pylint: disable=cyclic-import
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# History record keys that events keep in slots:
+EVENT_FIELDS: Tuple[str, ...] = (
+    "create_time",
+    "device_sn",
+    "device_type",
+    "end_time",
+    "frame_num",
+    "has_human",
+    "monitor_id",
+    "start_time",
+    "station_sn",
+    "storage_type",
+)
+
+# History record keys that events keep, but only decode when used:
+EVENT_EXTRA_FIELDS: Tuple[str, ...] = (
+    "cloud_path",
+    "device_name",
+    "hevc_storage_path",
+    "is_favorite",
+    "station_name",
+    "storage_path",
+    "thumb_path",
+    "video_type",
+    "viewed",
+)
+
+# How many records are written per transaction by default:
+DEFAULT_BATCH_SIZE: int = 500
+
+_SCHEMA: Tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        monitor_id INTEGER PRIMARY KEY,
+        device_sn TEXT,
+        station_sn TEXT,
+        start_time INTEGER,
+        end_time INTEGER,
+        has_human INTEGER,
+        record TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS events_device ON events (device_sn, start_time)",
+    "CREATE INDEX IF NOT EXISTS events_station ON events (station_sn, start_time)",
+    "CREATE INDEX IF NOT EXISTS events_start ON events (start_time)",
+    "CREATE INDEX IF NOT EXISTS events_human ON events (has_human, start_time)",
+)
+
+
+class Event:
+    """Define a history event.
+
+    Events keep the record fields that are used most in slots and the other
+    useful ones as a JSON string that is decoded on first use. P2P licences,
+    DIDs and keys are dropped.
+    """
+
+    __slots__ = ("_api", "_extra", "_extra_json", *EVENT_FIELDS)
+
+    def __init__(self, api: "Optional[API]", record: dict) -> None:
+        """Initialize."""
+        self._api = api
+        self._extra: Optional[Dict[str, Any]] = None
+        self._extra_json: str = json.dumps(
+            {key: record[key] for key in EVENT_EXTRA_FIELDS if key in record}
+        )
+        self.create_time: Optional[int] = record.get("create_time")
+        self.device_sn: str = sys.intern(record.get("device_sn") or "")
+        self.device_type: Optional[int] = record.get("device_type")
+        self.end_time: Optional[int] = record.get("end_time")
+        self.frame_num: Optional[int] = record.get("frame_num")
+        self.has_human: int = record.get("has_human") or 0
+        self.monitor_id: int = record["monitor_id"]
+        self.start_time: Optional[int] = record.get("start_time")
+        self.station_sn: str = sys.intern(record.get("station_sn") or "")
+        self.storage_type: Optional[int] = record.get("storage_type")
+
+    def __repr__(self) -> str:
+        """Return a representation of the event."""
+        return f"<Event {self.monitor_id} {self.device_sn} {self.start_time}>"
+
+    @property
+    def created(self) -> Optional[datetime]:
+        """Return when the event record was created."""
+        if self.create_time is None:
+            return None
+        return datetime.fromtimestamp(self.create_time, timezone.utc)
+
+    @property
+    def device(self) -> "Optional[BaseDevice]":
+        """Return the device that recorded the event, if it is known."""
+        if self._api is None:
+            return None
+        return self._api.devices.get(self.device_sn)
+
+    @property
+    def end(self) -> Optional[datetime]:
+        """Return when the event ended."""
+        if self.end_time is None:
+            return None
+        return datetime.fromtimestamp(self.end_time / 1000, timezone.utc)
+
+    @property
+    def extra(self) -> Dict[str, Any]:
+        """Return the rarely used record fields that were kept."""
+        if self._extra is None:
+            self._extra = json.loads(self._extra_json)
+        return self._extra
+
+    @property
+    def is_person(self) -> bool:
+        """Return whether a person was detected."""
+        return bool(self.has_human)
+
+    @property
+    def name(self) -> Optional[str]:
+        """Return the name of the device that recorded the event."""
+        return self.extra.get("device_name")
+
+    @property
+    def record(self) -> dict:
+        """Return the fields that were kept as a history record."""
+        record = dict(self.extra)
+        for key in EVENT_FIELDS:
+            record[key] = getattr(self, key)
+        return record
+
+    @property
+    def start(self) -> Optional[datetime]:
+        """Return when the event started."""
+        if self.start_time is None:
+            return None
+        return datetime.fromtimestamp(self.start_time / 1000, timezone.utc)
+
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        """Return the URL of the event thumbnail."""
+        return self.extra.get("thumb_path")
+
+
+def _event_time(value: Union[datetime, int]) -> int:
+    """Return a time as epoch milliseconds, like history records have them."""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return value * 1000
+
+
+class EventStore:
+    """Define a SQLite store for history records.
+
+    Records are returned as the same dictionaries the API returns. The default
+    path keeps the records in memory.
+    """
+
+    def __init__(
+        self, path: str = ":memory:", *, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> None:
+        """Initialize."""
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock: threading.Lock = threading.Lock()
+        self.batch_size: int = batch_size
+        self.path: str = path
+
+    @staticmethod
+    async def _async_run(func, *args):
+        """Run blocking database I/O in the default executor."""
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the database connection, creating the schema if needed."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            with self._connection:
+                for statement in _SCHEMA:
+                    self._connection.execute(statement)
+        return self._connection
+
+    async def async_close(self) -> None:
+        """Close the database."""
+        await self._async_run(self._close)
+
+    def _close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    async def async_upsert(self, records: Iterable[dict]) -> int:
+        """Add or replace records and return how many were written."""
+        return await self._async_run(self._upsert, list(records))
+
+    def _upsert(self, records: List[dict]) -> int:
+        """Write records in batches, one transaction per batch."""
+        rows = [
+            (
+                record["monitor_id"],
+                record.get("device_sn"),
+                record.get("station_sn"),
+                record.get("start_time"),
+                record.get("end_time"),
+                record.get("has_human"),
+                json.dumps(record),
+            )
+            for record in records
+        ]
+        with self._lock:
+            connection = self._connect()
+            for index in range(0, len(rows), self.batch_size):
+                with connection:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        rows[index : index + self.batch_size],
+                    )
+        _LOGGER.debug("Stored %s history records", len(rows))
+        return len(rows)
+
+    async def async_query(
+        self,
+        *,
+        device_sn: Optional[str] = None,
+        end_time: Union[datetime, int, None] = None,
+        has_human: Optional[bool] = None,
+        limit: Optional[int] = None,
+        start_time: Union[datetime, int, None] = None,
+        station_sn: Optional[str] = None,
+    ) -> List[dict]:
+        """Return the matching records, newest first.
+
+        Times are datetimes or epoch seconds, like `API.async_iter_history`
+        takes them; records starting at `start_time` or later and before
+        `end_time` match.
+        """
+        conditions = []
+        args: List[Any] = []
+        if device_sn is not None:
+            conditions.append("device_sn = ?")
+            args.append(device_sn)
+        if station_sn is not None:
+            conditions.append("station_sn = ?")
+            args.append(station_sn)
+        if has_human is not None:
+            conditions.append("has_human > 0" if has_human else "has_human = 0")
+        if start_time is not None:
+            conditions.append("start_time >= ?")
+            args.append(_event_time(start_time))
+        if end_time is not None:
+            conditions.append("start_time < ?")
+            args.append(_event_time(end_time))
+
+        sql = "SELECT record FROM events"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY start_time DESC, monitor_id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return await self._async_run(self._query, sql, args)
+
+    def _query(self, sql: str, args: List[Any]) -> List[dict]:
+        """Run a query and decode the records."""
+        with self._lock:
+            rows = self._connect().execute(sql, args).fetchall()
+        return [json.loads(row[0]) for row in rows]
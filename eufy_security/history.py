@@ -0,0 +1,117 @@
+"""Define an incremental history sync."""
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .store import MemoryStore, Store
+
+if TYPE_CHECKING:
+    from .api import API  # pylint: disable=cyclic-import
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# How many seconds before the newest record each sync looks back:
+DEFAULT_HISTORY_OVERLAP: int = 300
+
+
+class HistorySync:
+    """Define an object that fetches only history records it hasn't seen.
+
+    The newest `create_time` seen is the high-water mark. Each sync requests
+    records from `overlap` seconds before it, so records that arrive late are
+    not lost, and leaves out records it has already returned. The checkpoint is
+    kept in the store under `key`, so a restart resumes where the last sync
+    stopped.
+    """
+
+    def __init__(
+        self,
+        api: "API",
+        *,
+        device_sn: str = "",
+        key: Optional[str] = None,
+        overlap: int = DEFAULT_HISTORY_OVERLAP,
+        store: Optional[Store] = None,
+    ) -> None:
+        """Initialize."""
+        self._api: "API" = api
+        self._loaded: bool = False
+        self._seen: Dict[int, int] = {}
+        self.create_time: Optional[int] = None
+        self.device_sn: str = device_sn
+        self.key: str = key or (f"history_{device_sn}" if device_sn else "history")
+        self.monitor_id: Optional[int] = None
+        self.overlap: int = overlap
+        self.store: Store = MemoryStore() if store is None else store
+
+    async def _async_load(self) -> None:
+        """Load the checkpoint from the store."""
+        data = await self.store.async_load(self.key)
+        self._loaded = True
+        if not data:
+            return
+        self.create_time = data["create_time"]
+        self.monitor_id = data["monitor_id"]
+        self._seen = {
+            monitor_id: create_time for monitor_id, create_time in data["seen"]
+        }
+
+    async def _async_save(self) -> None:
+        """Save the checkpoint to the store."""
+        await self.store.async_save(
+            self.key,
+            {
+                "create_time": self.create_time,
+                "monitor_id": self.monitor_id,
+                "seen": sorted(self._seen.items()),
+            },
+        )
+
+    async def async_reset(self) -> None:
+        """Forget the checkpoint, so the next sync fetches everything again."""
+        await self.store.async_remove(self.key)
+        self._loaded = True
+        self._seen = {}
+        self.create_time = None
+        self.monitor_id = None
+
+    async def async_sync(self) -> List[dict]:
+        """Return the records added since the last sync, newest first."""
+        if not self._loaded:
+            await self._async_load()
+
+        start_time = None
+        if self.create_time is not None:
+            start_time = max(self.create_time - self.overlap, 0)
+
+        records = []
+        async for record in self._api.async_iter_history(
+            device_sn=self.device_sn, start_time=start_time
+        ):
+            if record["monitor_id"] in self._seen:
+                continue
+            if start_time is not None and record["create_time"] < start_time:
+                # Older than the overlap, so it may have been returned before:
+                continue
+            self._seen[record["monitor_id"]] = record["create_time"]
+            records.append(record)
+
+        if not records:
+            return records
+
+        newest = max(records, key=lambda record: record["create_time"])
+        if self.create_time is None or newest["create_time"] >= self.create_time:
+            self.create_time = newest["create_time"]
+            self.monitor_id = newest["monitor_id"]
+
+        # Only records within the overlap can be returned by the next sync:
+        cutoff = self.create_time - self.overlap
+        self._seen = {
+            monitor_id: create_time
+            for monitor_id, create_time in self._seen.items()
+            if create_time >= cutoff
+        }
+        await self._async_save()
+        _LOGGER.debug(
+            "Synced %s new history records up to %s", len(records), self.monitor_id
+        )
+        return records
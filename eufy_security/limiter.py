@@ -0,0 +1,237 @@
+"""Define client-side rate limiting and adaptive concurrency control."""
+import asyncio
+from collections import deque
+import logging
+import time
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from aiohttp.client_exceptions import ClientResponseError
+
+from .errors import ServerError
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+def endpoint_family(endpoint: str) -> str:
+    """Return the family of an endpoint (e.g. "app" for "app/get_devs_list")."""
+    return endpoint.split("/", 1)[0]
+
+
+def is_overload(err: Optional[BaseException]) -> bool:
+    """Return whether the error means the server is overloaded."""
+    if isinstance(err, ClientResponseError):
+        return err.status == 429 or err.status >= 500
+    return isinstance(err, (asyncio.TimeoutError, ServerError))
+
+
+class TokenBucket:
+    """Define a token bucket allowing `rate` requests per second on average."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize."""
+        self._updated: float = time.monotonic()
+        self.capacity: float = capacity
+        self.rate: float = rate
+        self.throttled: int = 0
+        self.tokens: float = capacity
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def async_acquire(self) -> None:
+        """Take a token, waiting until one is available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        self.throttled += 1
+        # Reserve the token now, so concurrent waiters queue up behind it:
+        self.tokens -= 1
+        await asyncio.sleep(-self.tokens / self.rate)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of the bucket."""
+        self._refill()
+        return {
+            "capacity": self.capacity,
+            "rate": self.rate,
+            "throttled": self.throttled,
+            "tokens": self.tokens,
+        }
+
+
+class AIMDLimiter:  # pylint: disable=too-many-instance-attributes
+    """Define a concurrency cap using additive increase/multiplicative decrease.
+
+    Every successful request raises the cap by `increase / limit` (about
+    `increase` per round of requests); an overloaded response multiplies it by
+    `decrease`, at most once per `cooldown` seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: float = 8,
+        minimum: float = 1,
+        maximum: float = 32,
+        increase: float = 1,
+        decrease: float = 0.5,
+        cooldown: float = 1,
+    ) -> None:
+        """Initialize."""
+        self._last_decrease: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.cooldown: float = cooldown
+        self.decrease: float = decrease
+        self.decreases: int = 0
+        self.in_flight: int = 0
+        self.increase: float = increase
+        self.limit: float = initial
+        self.maximum: float = maximum
+        self.minimum: float = minimum
+        self.throttled: int = 0
+
+    async def async_acquire(self) -> None:
+        """Wait for a free slot and take it."""
+        if self.in_flight >= int(self.limit) or self._waiters:
+            self.throttled += 1
+            future = asyncio.get_event_loop().create_future()
+            self._waiters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                elif not future.cancelled():
+                    # The slot was handed over just before the cancellation:
+                    self.in_flight -= 1
+                    self._wake()
+                raise
+        else:
+            self.in_flight += 1
+
+    def release(self, success: Optional[bool]) -> None:
+        """Release a slot, adjusting the cap based on the outcome.
+
+        `success` is None when the outcome says nothing about server load.
+        """
+        self.in_flight -= 1
+        if success:
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+        elif success is not None:
+            now = time.monotonic()
+            if (
+                self._last_decrease is None
+                or now - self._last_decrease >= self.cooldown
+            ):
+                self._last_decrease = now
+                self.decreases += 1
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                _LOGGER.debug("Reducing concurrency limit to %.2f", self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to waiting callers."""
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of the limiter."""
+        return {
+            "decreases": self.decreases,
+            "in_flight": self.in_flight,
+            "limit": self.limit,
+            "throttled": self.throttled,
+            "waiting": len(self._waiters),
+        }
+
+
+class _Slot:
+    """Define a context manager holding a request slot."""
+
+    def __init__(self, limiter: "RequestLimiter", api_base: str, endpoint: str):
+        """Initialize."""
+        self._bucket = limiter.get_bucket(api_base, endpoint)
+        self._concurrency = limiter.get_concurrency(api_base)
+
+    async def __aenter__(self) -> None:
+        """Wait until the request is allowed to go out."""
+        await self._bucket.async_acquire()
+        await self._concurrency.async_acquire()
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        """Release the slot, reporting the outcome."""
+        if exc is None:
+            self._concurrency.release(True)
+        else:
+            self._concurrency.release(False if is_overload(exc) else None)
+
+
+class RequestLimiter:
+    """Define a limiter for requests across one or more API objects.
+
+    Each API base and endpoint family gets its own token bucket; each API base
+    gets its own adaptive concurrency cap. Share one limiter between API
+    objects to limit them together.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float = 10,
+        burst: float = 20,
+        family_rates: Optional[Dict[str, Tuple[float, float]]] = None,
+        **concurrency: Any,
+    ) -> None:
+        """Initialize.
+
+        `family_rates` maps endpoint families to a (rate, burst) tuple; the
+        remaining keyword arguments configure each `AIMDLimiter`.
+        """
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._concurrency: Dict[str, AIMDLimiter] = {}
+        self._concurrency_kwargs: Dict[str, Any] = concurrency
+        self.burst: float = burst
+        self.family_rates: Dict[str, Tuple[float, float]] = family_rates or {}
+        self.rate: float = rate
+
+    def get_bucket(self, api_base: str, endpoint: str) -> TokenBucket:
+        """Return the token bucket for the API base and endpoint family."""
+        family = endpoint_family(endpoint)
+        key = (api_base, family)
+        if key not in self._buckets:
+            rate, burst = self.family_rates.get(family, (self.rate, self.burst))
+            self._buckets[key] = TokenBucket(rate, burst)
+        return self._buckets[key]
+
+    def get_concurrency(self, api_base: str) -> AIMDLimiter:
+        """Return the concurrency limiter for the API base."""
+        if api_base not in self._concurrency:
+            self._concurrency[api_base] = AIMDLimiter(**self._concurrency_kwargs)
+        return self._concurrency[api_base]
+
+    def limit(self, api_base: str, endpoint: str) -> _Slot:
+        """Return an async context manager that holds a request slot."""
+        return _Slot(self, api_base, endpoint)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of every bucket and concurrency limiter."""
+        return {
+            "buckets": {
+                f"{api_base}/{family}": bucket.snapshot()
+                for (api_base, family), bucket in self._buckets.items()
+            },
+            "concurrency": {
+                api_base: limiter.snapshot()
+                for api_base, limiter in self._concurrency.items()
+            },
+        }
@@ -0,0 +1,289 @@
+"""Define per-endpoint request instrumentation."""
+from bisect import bisect_left
+from collections import Counter
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from aiohttp import TraceConfig
+
+# Upper bounds, in seconds, of the latency histogram buckets:
+LATENCY_BUCKETS: Sequence[float] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    float("inf"),
+)
+
+PERCENTILES: Sequence[int] = (50, 90, 99)
+
+TIMINGS: Sequence[str] = ("connect", "wait", "read", "decode", "total")
+
+
+class RequestSample:  # pylint: disable=too-many-instance-attributes
+    """Define the measurements of a single HTTP request.
+
+    `connect` is only known when the session uses `create_trace_config()`;
+    otherwise connecting is included in `wait`.
+    """
+
+    __slots__ = (
+        "_connect_started",
+        "_started",
+        "code",
+        "connect",
+        "decode",
+        "endpoint",
+        "error",
+        "method",
+        "read",
+        "request_bytes",
+        "response_bytes",
+        "status",
+        "total",
+        "wait",
+    )
+
+    def __init__(self, method: str, endpoint: str, request_bytes: int = 0) -> None:
+        """Initialize."""
+        self._connect_started: Optional[float] = None
+        self._started: float = time.perf_counter()
+        self.code: Optional[int] = None
+        self.connect: Optional[float] = None
+        self.decode: Optional[float] = None
+        self.endpoint: str = endpoint
+        self.error: Optional[str] = None
+        self.method: str = method
+        self.read: Optional[float] = None
+        self.request_bytes: int = request_bytes
+        self.response_bytes: int = 0
+        self.status: Optional[int] = None
+        self.total: Optional[float] = None
+        self.wait: Optional[float] = None
+
+    def _elapsed(self) -> float:
+        """Return the time spent in the phases measured so far."""
+        return sum(
+            phase
+            for phase in (self.connect, self.wait, self.read, self.decode)
+            if phase is not None
+        )
+
+    def connection_started(self) -> None:
+        """Mark the start of waiting for or creating a connection."""
+        self._connect_started = time.perf_counter()
+
+    def connection_finished(self) -> None:
+        """Mark the end of waiting for or creating a connection."""
+        if self._connect_started is not None:
+            connect = time.perf_counter() - self._connect_started
+            self.connect = (self.connect or 0) + connect
+            self._connect_started = None
+
+    def headers_received(self, status: int) -> None:
+        """Mark the arrival of the response headers."""
+        self.status = status
+        self.wait = time.perf_counter() - self._started - (self.connect or 0)
+
+    def body_read(self, size: int) -> None:
+        """Mark the end of reading the response body."""
+        self.response_bytes = size
+        self.read = time.perf_counter() - self._started - self._elapsed()
+
+    def body_decoded(self) -> None:
+        """Mark the end of decoding the response body."""
+        self.decode = time.perf_counter() - self._started - self._elapsed()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Mark the end of the request."""
+        self.total = time.perf_counter() - self._started
+        if error is not None:
+            self.error = type(error).__name__
+
+
+class Histogram:
+    """Define a fixed-bucket histogram with estimated percentiles."""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """Initialize."""
+        self.bounds: Sequence[float] = bounds
+        self.count: int = 0
+        self.counts = [0] * len(bounds)
+        self.maximum: float = 0
+        self.total: float = 0
+
+    def add(self, value: float) -> None:
+        """Add a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.maximum = max(self.maximum, value)
+        self.total += value
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Estimate a percentile by interpolating inside its bucket."""
+        if not self.count:
+            return None
+
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0
+                upper = min(self.bounds[index], self.maximum)
+                return lower + (upper - lower) * max(rank - seen, 0) / count
+            seen += count
+        return self.maximum
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the histogram and its percentiles."""
+        return {
+            "buckets": dict(zip(self.bounds, self.counts)),
+            "count": self.count,
+            "max": self.maximum,
+            "mean": self.total / self.count if self.count else None,
+            **{f"p{percent}": self.percentile(percent) for percent in PERCENTILES},
+        }
+
+
+class EndpointMetrics:  # pylint: disable=too-many-instance-attributes
+    """Define the aggregated measurements of an endpoint."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.codes: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.reauths: int = 0
+        self.request_bytes: int = 0
+        self.requests: int = 0
+        self.response_bytes: int = 0
+        self.retries: int = 0
+        self.statuses: Counter = Counter()
+        self.timings: Dict[str, Histogram] = {timing: Histogram() for timing in TIMINGS}
+
+    def add(self, sample: RequestSample) -> None:
+        """Add the measurements of a request."""
+        self.requests += 1
+        self.request_bytes += sample.request_bytes
+        self.response_bytes += sample.response_bytes
+        if sample.status is not None:
+            self.statuses[sample.status] += 1
+        if sample.code is not None:
+            self.codes[sample.code] += 1
+        if sample.error is not None:
+            self.errors[sample.error] += 1
+        for timing, histogram in self.timings.items():
+            value = getattr(sample, timing)
+            if value is not None:
+                histogram.add(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the aggregated measurements."""
+        return {
+            "codes": dict(self.codes),
+            "errors": dict(self.errors),
+            "reauths": self.reauths,
+            "request_bytes": self.request_bytes,
+            "requests": self.requests,
+            "response_bytes": self.response_bytes,
+            "retries": self.retries,
+            "statuses": dict(self.statuses),
+            "timings": {
+                timing: histogram.snapshot()
+                for timing, histogram in self.timings.items()
+            },
+        }
+
+
+class MetricsHook:
+    """Define the interface API objects report measurements to.
+
+    This base class discards everything; use it to turn instrumentation off.
+    """
+
+    def record(self, sample: RequestSample) -> None:
+        """Record a finished HTTP request."""
+
+    def record_reauth(self, endpoint: str) -> None:
+        """Record a login caused by a rejected token."""
+
+    def record_retry(self, endpoint: str) -> None:
+        """Record a retried request."""
+
+
+class MetricsAggregator(MetricsHook):
+    """Define an in-memory aggregator of measurements per endpoint."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+
+    def _get(self, endpoint: str) -> EndpointMetrics:
+        """Return the metrics of an endpoint."""
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = EndpointMetrics()
+        return self.endpoints[endpoint]
+
+    def record(self, sample: RequestSample) -> None:
+        """Record a finished HTTP request."""
+        self._get(sample.endpoint).add(sample)
+
+    def record_reauth(self, endpoint: str) -> None:
+        """Record a login caused by a rejected token."""
+        self._get(endpoint).reauths += 1
+
+    def record_retry(self, endpoint: str) -> None:
+        """Record a retried request."""
+        self._get(endpoint).retries += 1
+
+    def reset(self) -> None:
+        """Forget every measurement."""
+        self.endpoints.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return the aggregated measurements of every endpoint."""
+        return {
+            endpoint: metrics.snapshot() for endpoint, metrics in self.endpoints.items()
+        }
+
+
+def _get_sample(trace_config_ctx) -> Optional[RequestSample]:
+    """Return the sample a traced request belongs to, if any."""
+    sample = trace_config_ctx.trace_request_ctx
+    return sample if isinstance(sample, RequestSample) else None
+
+
+async def _on_connection_started(session, trace_config_ctx, params) -> None:
+    """Mark the start of waiting for or creating a connection."""
+    sample = _get_sample(trace_config_ctx)
+    if sample:
+        sample.connection_started()
+
+
+async def _on_connection_finished(session, trace_config_ctx, params) -> None:
+    """Mark the end of waiting for or creating a connection."""
+    sample = _get_sample(trace_config_ctx)
+    if sample:
+        sample.connection_finished()
+
+
+def create_trace_config() -> TraceConfig:
+    """Return a trace config that splits connection time from waiting time.
+
+    Pass it to the `ClientSession` given to the API:
+
+        ClientSession(trace_configs=[create_trace_config()])
+    """
+    trace_config = TraceConfig()
+    trace_config.on_connection_queued_start.append(_on_connection_started)
+    trace_config.on_connection_queued_end.append(_on_connection_finished)
+    trace_config.on_connection_create_start.append(_on_connection_started)
+    trace_config.on_connection_create_end.append(_on_connection_finished)
+    return trace_config
@@ -1,12 +1,53 @@
 """Define a Eufy parameter object."""
 from datetime import datetime, timezone
+from functools import lru_cache
 import logging
+import marshal
 from typing import Any, Dict, List, Union
 
-from .types import ParamType
+from .types import PARAM_TYPES_BY_VALUE, ParamType
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
 
+# How many decoded param values are shared between params:
+DECODE_CACHE_SIZE: int = 1024
+
+# Marks a param value that hasn't been decoded yet:
+_UNSET = object()
+
+
+class _Marshalled(bytes):
+    """Define a decoded dictionary or list, marshalled so it isn't shared."""
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE, typed=True)
+def _decode_cached(param_type: ParamType, raw_value: Any) -> Any:
+    """Decode a raw param value, remembering recent results."""
+    value = param_type.loads(raw_value)
+    if isinstance(value, (dict, list)):
+        return _Marshalled(marshal.dumps(value))
+    return value
+
+
+def decode_value(param_type: ParamType, raw_value: Any) -> Any:
+    """Decode a raw param value.
+
+    Params with the same type and raw value share immutable decoded values.
+    Decoded JSON objects and arrays are cached in marshalled form, which loads
+    faster than decoding base64 and JSON again, so each param gets its own copy
+    that it can modify.
+    """
+    try:
+        value = _decode_cached(param_type, raw_value)
+    except TypeError:
+        if isinstance(raw_value, (list, dict)):
+            # Unhashable raw values can't be cached:
+            return param_type.loads(raw_value)
+        raise
+    if isinstance(value, _Marshalled):
+        return marshal.loads(value)
+    return value
+
 
 class Param:
     """Define a param object."""
@@ -14,12 +55,15 @@ class Param:
     def __init__(self, param_info: Union[Dict[str, Any], ParamType]) -> None:
         """Initialise the param."""
         try:
-            self._value = None
+            self._value: Any = _UNSET
             if isinstance(param_info, ParamType):
                 self.type = param_info
                 self.param_info = {}
             else:
-                self.type = ParamType(param_info["param_type"])
+                param_type = param_info["param_type"]
+                self.type = PARAM_TYPES_BY_VALUE.get(param_type) or ParamType(
+                    param_type
+                )
                 self.param_info = param_info.copy()
         except ValueError as err:
             _LOGGER.debug(
@@ -53,8 +97,8 @@ class Param:
     @property
     def value(self) -> Any:
         """Return the param value."""
-        if not self._value:
-            self._value = self.type.loads(self.param_info["param_value"])
+        if self._value is _UNSET:
+            self._value = decode_value(self.type, self.param_info["param_value"])
         return self._value
 
     def set_value(self, value: Any) -> None:
@@ -74,44 +118,56 @@ class Param:
 
 
 class Params(list):
-    """Define a dictionary of parameters."""
+    """Define a list of parameters, indexed by param type."""
 
     def __init__(self, param_infos: List[Dict[str, Any]] = []):
-        """Initialise params."""
+        """Initialise params.
+
+        Params of unknown types are kept as they are in `unknown`.
+        """
         params = []
+        self.unknown: List[Dict[str, Any]] = []
         for param_info in param_infos:
-            try:
+            param_type = param_info["param_type"]
+            if isinstance(param_type, ParamType) or param_type in PARAM_TYPES_BY_VALUE:
                 params.append(Param(param_info))
-            except ValueError:
-                pass
+            else:
+                self.unknown.append(param_info)
 
         super().__init__(params)
+        self._reindex()
+
+    def _reindex(self) -> None:
+        """Rebuild the index; the first param of each type wins."""
+        self._index: Dict[ParamType, Param] = {}
+        for param in self:
+            self._index.setdefault(param.type, param)
 
     def __contains__(self, item: Any) -> bool:
         """Check a param or param type is contained in this list."""
         if isinstance(item, Param):
             item = item.type
-        elif isinstance(item, ParamType):
-            pass
-        else:
+        elif not isinstance(item, ParamType):
             return False
 
-        for param in self:
-            if param.type == item:
-                return True
+        return item in self._index
 
-        return False
+    def __delitem__(self, key: Any) -> None:
+        """Delete params by position."""
+        super().__delitem__(key)
+        self._reindex()
 
     def __getitem__(self, key: Any) -> Param:
         """Return the param for the given param type."""
         try:
-            param_type = ParamType.lookup(key)
-            for param in self:
-                if param.type == param_type:
-                    return param
-        except ValueError:
-            pass
-        raise KeyError(key)
+            return self._index[ParamType.lookup(key)]
+        except (KeyError, ValueError):
+            raise KeyError(key) from None
+
+    def __iadd__(self, params: Any) -> "Params":
+        """Append params."""
+        self.extend(params)
+        return self
 
     def __setitem__(self, param_type: Any, value: Any) -> None:
         """Update or add parameters for the param type."""
@@ -123,9 +179,68 @@ class Params(list):
             self.append(param)
         param.set_value(value)
 
+    def append(self, param: Param) -> None:
+        """Append a param."""
+        super().append(param)
+        self._index.setdefault(param.type, param)
+
+    def clear(self) -> None:
+        """Remove every param."""
+        super().clear()
+        self._index.clear()
+
+    def extend(self, params: Any) -> None:
+        """Append params."""
+        for param in params:
+            self.append(param)
+
+    def insert(self, index: int, param: Param) -> None:
+        """Insert a param before the position."""
+        super().insert(index, param)
+        self._reindex()
+
+    def pop(self, index: int = -1) -> Param:
+        """Remove and return the param at the position."""
+        param = super().pop(index)
+        self._reindex()
+        return param
+
+    def remove(self, param: Param) -> None:
+        """Remove the first param equal to the given one."""
+        super().remove(param)
+        self._reindex()
+
+    def changed(self, data: Dict[Any, Any]) -> Dict[ParamType, Any]:
+        """Return the values in the dictionary that differ from these params.
+
+        Values are compared in their encoded form with the raw param values, so
+        "1" and True can be equal and values modified in place are compared
+        with what the API last returned.
+        """
+        changed = {}
+        for key, value in data.items():
+            param_type = ParamType.lookup(key)
+            try:
+                current = self[param_type]
+            except KeyError:
+                changed[param_type] = value
+                continue
+
+            raw_value = current.param_info.get("param_value")
+            try:
+                encoded = param_type.dumps(value)
+                equal = encoded == raw_value or (
+                    param_type.loads(encoded) == param_type.loads(raw_value)
+                )
+            except (KeyError, TypeError, ValueError):
+                equal = False
+            if not equal:
+                changed[param_type] = value
+        return changed
+
     def items(self) -> Dict[ParamType, Param]:
         """Return a dictionary of params."""
-        return {param.type: param for param in self}
+        return dict(self._index)
 
     def update(self, data: Dict[str, Any]) -> None:
         """Update the params with the provided dictionary."""
@@ -0,0 +1,120 @@
+"""Define a retry policy for transient API errors."""
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, FrozenSet, Iterable, Optional, Tuple, Type
+
+from aiohttp.client_exceptions import ClientConnectionError, ClientResponseError
+
+from .errors import ConnectError, NetworkError, ServerError
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# Endpoints that can be repeated without side effects:
+IDEMPOTENT_ENDPOINTS: FrozenSet[str] = frozenset(
+    {
+        "app/get_devs_list",
+        "app/get_hub_list",
+        "event/app/get_all_history_record",
+        "event/app/get_history_by_time",
+        "hub/get_dev_info",
+        "hub/get_devs_params",
+        "passport/login",
+        "web/equipment/start_stream",
+        "web/equipment/stop_stream",
+    }
+)
+
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+    asyncio.TimeoutError,
+    ClientConnectionError,
+    ConnectError,
+    NetworkError,
+    ServerError,
+)
+
+RETRYABLE_STATUSES: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryPolicy:  # pylint: disable=too-many-instance-attributes
+    """Define when and how often a failed request is retried.
+
+    Delays use exponential backoff with full jitter. Requests to endpoints that
+    aren't in `safe_endpoints` are only retried when the caller marks them safe.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10,
+        deadline: Optional[float] = None,
+        retryable_errors: Tuple[Type[BaseException], ...] = RETRYABLE_ERRORS,
+        retryable_statuses: Iterable[int] = RETRYABLE_STATUSES,
+        safe_endpoints: Iterable[str] = IDEMPOTENT_ENDPOINTS,
+    ) -> None:
+        """Initialize."""
+        self.base_delay: float = base_delay
+        self.deadline: Optional[float] = deadline
+        self.max_attempts: int = max_attempts
+        self.max_delay: float = max_delay
+        self.retryable_errors: Tuple[Type[BaseException], ...] = retryable_errors
+        self.retryable_statuses: FrozenSet[int] = frozenset(retryable_statuses)
+        self.safe_endpoints: FrozenSet[str] = frozenset(safe_endpoints)
+
+    def backoff(self, attempt: int) -> float:
+        """Return the delay before the given retry (starting at 1)."""
+        return random.uniform(  # nosec
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+    def is_retryable(self, err: BaseException) -> bool:
+        """Return whether the error is transient."""
+        if isinstance(err, ClientResponseError):
+            return err.status in self.retryable_statuses
+        return isinstance(err, self.retryable_errors)
+
+    def is_safe(self, endpoint: str) -> bool:
+        """Return whether the endpoint can be retried without side effects."""
+        return endpoint in self.safe_endpoints
+
+    async def async_call(
+        self,
+        func: Callable[[], Awaitable],
+        endpoint: str,
+        *,
+        safe: Optional[bool] = None,
+        on_retry: Optional[Callable[[BaseException], None]] = None,
+    ):
+        """Call the coroutine function, retrying transient errors."""
+        if safe is None:
+            safe = self.is_safe(endpoint)
+        max_attempts = self.max_attempts if safe else 1
+        deadline = self.deadline and time.monotonic() + self.deadline
+
+        attempt = 1
+        while True:
+            try:
+                if deadline:
+                    return await asyncio.wait_for(func(), deadline - time.monotonic())
+                return await func()
+            except self.retryable_errors + (ClientResponseError,) as err:
+                if attempt >= max_attempts or not self.is_retryable(err):
+                    raise
+
+                delay = self.backoff(attempt)
+                if deadline and time.monotonic() + delay >= deadline:
+                    raise
+
+                _LOGGER.debug(
+                    "Retrying %s in %.2f seconds after error: %s", endpoint, delay, err
+                )
+                if on_retry:
+                    on_retry(err)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+
+NO_RETRY: RetryPolicy = RetryPolicy(max_attempts=1)
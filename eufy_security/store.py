@@ -0,0 +1,111 @@
+"""Define stores that persist state between runs."""
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class Store(ABC):
+    """Define a base key/value store for JSON-serializable entries."""
+
+    @abstractmethod
+    async def async_load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry stored under the key, if any."""
+
+    @abstractmethod
+    async def async_remove(self, key: str) -> None:
+        """Remove the entry stored under the key."""
+
+    @abstractmethod
+    async def async_save(self, key: str, data: Dict[str, Any]) -> None:
+        """Store an entry under the key."""
+
+
+class MemoryStore(Store):
+    """Define a store that keeps entries in memory."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._data: Dict[str, Dict[str, Any]] = {}
+
+    async def async_load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry stored under the key, if any."""
+        return self._data.get(key)
+
+    async def async_remove(self, key: str) -> None:
+        """Remove the entry stored under the key."""
+        self._data.pop(key, None)
+
+    async def async_save(self, key: str, data: Dict[str, Any]) -> None:
+        """Store an entry under the key."""
+        self._data[key] = data
+
+
+class FileStore(Store):
+    """Define a store that keeps entries in a JSON file.
+
+    The file is only readable by its owner since it may hold access tokens.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize."""
+        self._lock: Optional[asyncio.Lock] = None
+        self.path: str = path
+
+    async def async_load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry stored under the key, if any."""
+        data = await self._async_run(self._read)
+        return data.get(key)
+
+    async def async_remove(self, key: str) -> None:
+        """Remove the entry stored under the key."""
+        async with self._get_lock():
+            data = await self._async_run(self._read)
+            if data.pop(key, None) is not None:
+                await self._async_run(self._write, data)
+
+    async def async_save(self, key: str, data: Dict[str, Any]) -> None:
+        """Store an entry under the key."""
+        async with self._get_lock():
+            entries = await self._async_run(self._read)
+            entries[key] = data
+            await self._async_run(self._write, entries)
+
+    @staticmethod
+    async def _async_run(func, *args):
+        """Run blocking file I/O in the default executor."""
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    def _get_lock(self) -> asyncio.Lock:
+        """Return the lock serializing writes, created inside the running loop."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """Read every entry from the file."""
+        try:
+            with open(self.path, encoding="utf-8") as fptr:
+                return json.load(fptr)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            _LOGGER.warning("Ignoring unreadable store file: %s", self.path)
+            return {}
+
+    def _write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """Atomically replace the file with the given entries."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".eufy_security")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fptr:
+                json.dump(data, fptr)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
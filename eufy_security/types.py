@@ -1,5 +1,6 @@
 """Define types."""
 from enum import Enum
+from typing import Dict, FrozenSet
 
 from .converters import (
     BoolConverter,
@@ -44,48 +45,54 @@ class DeviceType(Enum):
     @property
     def is_camera(self) -> bool:
         """Return whether device type is a camera."""
-        return self in [
-            DeviceType.CAMERA,
-            DeviceType.CAMERA2,
-            DeviceType.CAMERA_E,
-            DeviceType.CAMERA2C,
-            DeviceType.INDOOR_CAMERA,
-            DeviceType.INDOOR_PT_CAMERA,
-            DeviceType.FLOODLIGHT,
-            DeviceType.DOORBELL,
-            DeviceType.BATTERY_DOORBELL,
-            DeviceType.BATTERY_DOORBELL_2,
-            DeviceType.CAMERA2C_PRO,
-            DeviceType.CAMERA2_PRO,
-            DeviceType.INDOOR_CAMERA_1080,
-            DeviceType.INDOOR_PT_CAMERA_1080,
-            DeviceType.SOLO_CAMERA,
-            DeviceType.SOLO_CAMERA_PRO,
-        ]
+        return self in CAMERA_TYPES
 
     @property
     def is_station(self) -> bool:
         """Return whether device type is a station."""
-        return self in [
-            DeviceType.STATION,
-        ]
+        return self in STATION_TYPES
 
     @property
     def is_sensor(self) -> bool:
         """Return whether device type is a sensor."""
-        return self in [
-            DeviceType.SENSOR,
-            DeviceType.MOTION_SENSOR,
-        ]
+        return self in SENSOR_TYPES
 
     @property
     def is_doorbell(self) -> bool:
         """Return whether device type is a doorbell."""
-        return self in [
-            DeviceType.DOORBELL,
-            DeviceType.BATTERY_DOORBELL,
-            DeviceType.BATTERY_DOORBELL_2,
-        ]
+        return self in DOORBELL_TYPES
+
+
+CAMERA_TYPES: FrozenSet[DeviceType] = frozenset(
+    {
+        DeviceType.CAMERA,
+        DeviceType.CAMERA2,
+        DeviceType.CAMERA_E,
+        DeviceType.CAMERA2C,
+        DeviceType.INDOOR_CAMERA,
+        DeviceType.INDOOR_PT_CAMERA,
+        DeviceType.FLOODLIGHT,
+        DeviceType.DOORBELL,
+        DeviceType.BATTERY_DOORBELL,
+        DeviceType.BATTERY_DOORBELL_2,
+        DeviceType.CAMERA2C_PRO,
+        DeviceType.CAMERA2_PRO,
+        DeviceType.INDOOR_CAMERA_1080,
+        DeviceType.INDOOR_PT_CAMERA_1080,
+        DeviceType.SOLO_CAMERA,
+        DeviceType.SOLO_CAMERA_PRO,
+    }
+)
+
+DOORBELL_TYPES: FrozenSet[DeviceType] = frozenset(
+    {DeviceType.DOORBELL, DeviceType.BATTERY_DOORBELL, DeviceType.BATTERY_DOORBELL_2}
+)
+
+SENSOR_TYPES: FrozenSet[DeviceType] = frozenset(
+    {DeviceType.SENSOR, DeviceType.MOTION_SENSOR}
+)
+
+STATION_TYPES: FrozenSet[DeviceType] = frozenset({DeviceType.STATION})
 
 
 class ScheduleMode(Enum):
@@ -146,7 +153,10 @@ class ParamType(Enum):
             return name_or_value
         if type(name_or_value) == str:
             return ParamType[name_or_value]
-        else:
+        try:
+            return PARAM_TYPES_BY_VALUE[name_or_value]
+        except (KeyError, TypeError):
+            # Let the enum raise the appropriate error:
             return ParamType(name_or_value)
 
     CHIME_STATE = 2015
@@ -210,3 +220,8 @@ class ParamType(Enum):
 
     PRIVATE_MODE = 99904, BoolConverter
     CUSTOM_RTSP_URL = 999991, StringConverter
+
+
+PARAM_TYPES_BY_VALUE: Dict[int, ParamType] = {
+    param_type.value: param_type for param_type in ParamType
+}
@@ -36,6 +36,8 @@ async def main() -> None:
 
                 _LOGGER.info("Stopping RTSP Stream")
                 stream_url = await camera.async_stop_stream()
+
+            await api.async_close()
         except EufySecurityError as err:
             print(f"There was a/an {type(err)} error: {err}")
 
@@ -1,15 +1,27 @@
 """Define tests for the base API."""
-from datetime import datetime, timedelta
+import asyncio
+import gc
 import json
+import time
+import weakref
 
 import aiohttp
 import pytest
 
 from eufy_security import async_login
-from eufy_security.errors import InvalidCredentialsError, RequestError
+from eufy_security.api import API
+from eufy_security.device import Device
+from eufy_security.errors import InvalidCredentialsError, RequestError, ServerError
+from eufy_security.store import MemoryStore
 from eufy_security.types import ParamType
 
-from .common import TEST_EMAIL, TEST_PASSWORD, load_fixture
+from .common import (
+    TEST_ACCESS_TOKEN,
+    TEST_EMAIL,
+    TEST_PASSWORD,
+    load_fixture,
+    load_json_fixture,
+)
 
 
 @pytest.mark.asyncio
@@ -156,6 +168,40 @@ async def test_empty_response(aresponses, login_success_response):
             await async_login(TEST_EMAIL, TEST_PASSWORD, websession)
 
 
+@pytest.mark.asyncio
+async def test_empty_hub_list_response(aresponses, login_success_response):
+    """Test that devices and stations are only applied together."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_devs_list",
+        "post",
+        aresponses.Response(
+            text=load_fixture("devices_list_response.json"), status=200
+        ),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_hub_list",
+        "post",
+        aresponses.Response(text=load_fixture("empty_response.json"), status=200),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        with pytest.raises(RequestError):
+            await api.async_update_device_info()
+        assert len(api.devices) == 0
+        assert len(api.stations) == 0
+        await api.async_close()
+
+
 @pytest.mark.asyncio
 async def test_expired_access_token(aresponses, login_success_response):
     """Test that an expired access token refreshes automatically and correctly."""
@@ -202,11 +248,109 @@ async def test_expired_access_token(aresponses, login_success_response):
 
     async with aiohttp.ClientSession() as websession:
         api = await async_login(TEST_EMAIL, TEST_PASSWORD, websession)
-        api._token_expiration = datetime.now() - timedelta(seconds=10)
+        api._token_expiration = time.monotonic() - 10
         await api.async_update_device_info()
         assert len(api.devices) == 2
 
 
+@pytest.mark.asyncio
+async def test_expired_access_token_single_login(aresponses, login_success_response):
+    """Test that concurrent requests with an expired token share one login."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    for _ in range(3):
+        aresponses.add(
+            "security-app.eufylife.com",
+            "/v1/event/app/get_all_history_record",
+            "post",
+            aresponses.Response(text=load_fixture("history_response.json"), status=200),
+        )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        api._token_expiration = time.monotonic() - 10
+
+        results = await asyncio.gather(*[api.async_get_history() for _ in range(3)])
+        assert [len(history) for history in results] == [2, 2, 2]
+        assert api._token_expiration > time.monotonic()
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_proactive_token_refresh(aresponses, login_success_response):
+    """Test that a token about to expire is renewed in the background."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=load_fixture("history_response.json"), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, token_refresh_margin=60)
+        await api.async_authenticate()
+        assert api._refresh_handle is not None
+
+        api._token_expiration = time.monotonic() + 30
+        history = await api.async_get_history()
+        assert len(history) == 2
+        assert api._auth_future is not None
+
+        await api._auth_future
+        assert api._token_expiration > time.monotonic() + 60
+        await api.async_close()
+        assert api._refresh_handle is None
+
+
+@pytest.mark.asyncio
+async def test_token_refresh_does_not_keep_api(aresponses, login_success_response):
+    """Test that the scheduled token refresh doesn't keep a discarded API alive."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        handle = api._refresh_handle
+        assert handle is not None
+
+        api_ref = weakref.ref(api)
+        del api
+        gc.collect()
+        assert api_ref() is None
+
+        # The timer firing afterwards does nothing:
+        handle._run()
+        handle.cancel()
+
+
 @pytest.mark.asyncio
 async def test_get_history(aresponses, login_success_response):
     """Test getting the device history."""
@@ -440,3 +584,452 @@ async def test_set_params_for_station(aresponses, login_success_response):
         api = await async_login(TEST_EMAIL, TEST_PASSWORD, websession)
         station = next(iter(api.stations.values()))
         await api.async_set_params(station, {ParamType.SNOOZE_MODE: True})
+
+
+@pytest.mark.asyncio
+async def test_deduplicate_requests(aresponses, login_success_response):
+    """Test that identical concurrent requests share one response."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=load_fixture("history_response.json"), status=200),
+    )
+    for _ in range(2):
+        aresponses.add(
+            "security-app.eufylife.com",
+            "/v1/app/upload_devs_params",
+            "post",
+            aresponses.Response(
+                text=load_fixture("upload_devs_params_response.json"), status=200
+            ),
+        )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, deduplicate_requests=True)
+        await api.async_authenticate()
+
+        results = await asyncio.gather(*[api.async_get_history() for _ in range(3)])
+        assert [len(history) for history in results] == [2, 2, 2]
+        assert api.deduplicated_requests == 2
+        assert not api._inflight_requests
+
+        # Each caller gets its own copy of the shared response:
+        results[0].clear()
+        results[1][0]["device_name"] = "Changed"
+        assert results[2][0]["device_name"] == "Driveway"
+        assert len(results[2]) == 2
+
+        # Mutating endpoints are never shared:
+        body = {"device_sn": "abc", "station_sn": "def", "params": []}
+        await asyncio.gather(
+            api.request("post", "app/upload_devs_params", json=body),
+            api.request("post", "app/upload_devs_params", json=dict(body)),
+        )
+        assert api.deduplicated_requests == 2
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_restore_credentials(aresponses, login_success_response):
+    """Test that a stored token skips the login on the next start."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    for _ in range(2):
+        aresponses.add(
+            "security-app.eufylife.com",
+            "/v1/app/get_devs_list",
+            "post",
+            aresponses.Response(
+                text=load_fixture("devices_list_response.json"), status=200
+            ),
+        )
+        aresponses.add(
+            "security-app.eufylife.com",
+            "/v1/app/get_hub_list",
+            "post",
+            aresponses.Response(
+                text=load_fixture("hub_list_response.json"), status=200
+            ),
+        )
+
+    store = MemoryStore()
+    async with aiohttp.ClientSession() as websession:
+        api = await async_login(
+            TEST_EMAIL, TEST_PASSWORD, websession, credential_store=store
+        )
+        await api.async_close()
+        stored = await store.async_load(TEST_EMAIL)
+        assert stored["auth_token"] == TEST_ACCESS_TOKEN
+        assert stored["api_base"] == "https://security-app.eufylife.com/v1"
+
+        api = await async_login(
+            TEST_EMAIL, TEST_PASSWORD, websession, credential_store=store
+        )
+        assert api._token == TEST_ACCESS_TOKEN
+        assert len(api.devices) == 2
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_restore_credentials_rejected(aresponses, login_success_response):
+    """Test that a rejected stored token falls back to a fresh login."""
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_devs_list",
+        "post",
+        aresponses.Response(text=None, status=401),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_hub_list",
+        "post",
+        aresponses.Response(text=load_fixture("hub_list_response.json"), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_devs_list",
+        "post",
+        aresponses.Response(
+            text=load_fixture("devices_list_response.json"), status=200
+        ),
+    )
+
+    store = MemoryStore()
+    await store.async_save(
+        TEST_EMAIL,
+        {
+            "api_base": "https://security-app.eufylife.com/v1",
+            "auth_token": "revoked",
+            "token_expires_at": int(time.time()) + 3600,
+        },
+    )
+    async with aiohttp.ClientSession() as websession:
+        api = await async_login(
+            TEST_EMAIL, TEST_PASSWORD, websession, credential_store=store
+        )
+        assert api._token == TEST_ACCESS_TOKEN
+        assert len(api.devices) == 2
+        assert (await store.async_load(TEST_EMAIL))["auth_token"] == TEST_ACCESS_TOKEN
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_restore_expired_credentials(aresponses, login_success_response):
+    """Test that an expired stored token is not used."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    store = MemoryStore()
+    await store.async_save(
+        TEST_EMAIL,
+        {
+            "api_base": "https://security-app.eufylife.com/v1",
+            "auth_token": "expired",
+            "token_expires_at": int(time.time()) - 10,
+        },
+    )
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, credential_store=store)
+        assert not await api.async_restore_credentials()
+        await api.async_authenticate()
+        assert api._token == TEST_ACCESS_TOKEN
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"auth_token": "token", "token_expires_at": 4102444800},
+        {"api_base": "https://security-app.eufylife.com/v1", "auth_token": "token"},
+        {
+            "api_base": "https://security-app.eufylife.com/v1",
+            "auth_token": "token",
+            "token_expires_at": "tomorrow",
+        },
+        ["not", "a", "dictionary"],
+    ],
+)
+async def test_restore_invalid_credentials(aresponses, login_success_response, data):
+    """Test that invalid stored credentials fall back to a fresh login."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    store = MemoryStore()
+    await store.async_save(TEST_EMAIL, data)
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, credential_store=store)
+        assert not await api.async_restore_credentials()
+        await api.async_authenticate()
+        assert api._token == TEST_ACCESS_TOKEN
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_set_params_bulk(aresponses, login_success_response):
+    """Test setting params on many devices at once."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/upload_devs_params",
+        "post",
+        aresponses.Response(
+            text=json.dumps({"code": 999, "msg": "Server error"}), status=200
+        ),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/upload_devs_params",
+        "post",
+        aresponses.Response(
+            text=load_fixture("upload_devs_params_response.json"), status=200
+        ),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        api.devices.update(load_json_fixture("devices_list_response.json")["data"])
+        device1, device2 = api.devices.values()
+
+        results = await api.async_set_params_bulk(
+            {
+                device1: {ParamType.DETECT_SWITCH: 1},
+                device2: {ParamType.DETECT_SWITCH: 1},
+            }
+        )
+        assert isinstance(results[device1.serial], ServerError)
+        assert results[device2.serial] is None
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_set_params_bulk_concurrency():
+    """Test that stations run in parallel and their devices run in order."""
+    api = API(TEST_EMAIL, TEST_PASSWORD, None)
+    devices = [
+        Device(
+            api, {"device_sn": f"device{index}", "station_sn": f"station{index % 3}"}
+        )
+        for index in range(9)
+    ]
+    running = {}
+    peak = []
+
+    async def async_set_params(device, data, only_changed=False):
+        """Record how many uploads run at once."""
+        assert device.station_serial not in running
+        running[device.station_serial] = device
+        peak.append(len(running))
+        await asyncio.sleep(0)
+        del running[device.station_serial]
+
+    api.async_set_params = async_set_params
+    results = await api.async_set_params_bulk(
+        {device: {ParamType.DETECT_SWITCH: 1} for device in devices}, concurrency=2
+    )
+    assert results == {device.serial: None for device in devices}
+    assert max(peak) == 2
+
+
+@pytest.mark.asyncio
+async def test_set_params_only_changed(aresponses, login_success_response):
+    """Test that only changed params are uploaded."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    async def upload(request):
+        """Check the uploaded params."""
+        body = await request.json()
+        assert [param["param_type"] for param in body["params"]] == [
+            ParamType.CAMERA_SPEAKER_VOLUME.value
+        ]
+        return aresponses.Response(
+            text=load_fixture("upload_devs_params_response.json"), status=200
+        )
+
+    aresponses.add(
+        "security-app.eufylife.com", "/v1/app/upload_devs_params", "post", upload
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        api.devices.update(load_json_fixture("devices_list_response.json")["data"])
+        device = next(iter(api.devices.values()))
+
+        # Nothing changed, so nothing is uploaded:
+        await device.async_set_params(
+            {ParamType.CAMERA_PIR: True, ParamType.CAMERA_SPEAKER_VOLUME: "100"},
+            only_changed=True,
+        )
+
+        await device.async_set_params(
+            {ParamType.CAMERA_PIR: True, ParamType.CAMERA_SPEAKER_VOLUME: 50},
+            only_changed=True,
+        )
+        assert device.params[ParamType.CAMERA_SPEAKER_VOLUME].value == 50
+        assert device.pending_params == {ParamType.CAMERA_SPEAKER_VOLUME: "50"}
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_iter_history(aresponses, login_success_response):
+    """Test paging through the device history."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    record = load_json_fixture("history_response.json")["data"][0]
+    pages = {0: [5, 4], 4: [4, 3], 3: []}
+    bodies = []
+
+    async def history(request):
+        """Return a page of history records."""
+        body = await request.json()
+        bodies.append(body)
+        data = [
+            {**record, "monitor_id": monitor_id} for monitor_id in pages[body["id"]]
+        ]
+        return aresponses.Response(
+            text=json.dumps({"code": 0, "msg": "Succeed.", "data": data}), status=200
+        )
+
+    for _ in pages:
+        aresponses.add(
+            "security-app.eufylife.com",
+            "/v1/event/app/get_all_history_record",
+            "post",
+            history,
+        )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        records = [
+            record["monitor_id"]
+            async for record in api.async_iter_history(
+                device_sn="xxx", start_time=1572287000, page_size=2
+            )
+        ]
+        assert records == [5, 4, 3]
+        assert bodies[0] == {
+            "device_sn": "xxx",
+            "end_time": 0,
+            "id": 0,
+            "num": 2,
+            "pullup": True,
+            "start_time": 1572287000,
+        }
+        assert [body["id"] for body in bodies] == [0, 4, 3]
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_iter_history_stops_early(aresponses, login_success_response):
+    """Test that pages are only requested as records are consumed."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=load_fixture("history_response.json"), status=200),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        history = api.async_iter_history(page_size=2)
+        record = await history.__anext__()
+        assert record["device_name"] == "Driveway"
+        await history.aclose()
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_set_params_only_changed_modified_value(
+    aresponses, login_success_response
+):
+    """Test that a param value modified in place is uploaded."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    async def upload(request):
+        """Check the uploaded params."""
+        body = await request.json()
+        assert [param["param_type"] for param in body["params"]] == [
+            ParamType.SNOOZE_MODE.value
+        ]
+        return aresponses.Response(
+            text=load_fixture("upload_devs_params_response.json"), status=200
+        )
+
+    aresponses.add(
+        "security-app.eufylife.com", "/v1/app/upload_devs_params", "post", upload
+    )
+
+    device_info = load_json_fixture("devices_list_response.json")["data"][0]
+    device_info["params"].append(
+        {
+            "param_type": ParamType.SNOOZE_MODE.value,
+            "param_value": ParamType.SNOOZE_MODE.dumps({"enable": 1}),
+        }
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        api.devices.update([device_info])
+        device = next(iter(api.devices.values()))
+
+        value = device.params[ParamType.SNOOZE_MODE].value
+        value["enable"] = 0
+        await device.async_set_params({ParamType.SNOOZE_MODE: value}, only_changed=True)
+        assert device.params[ParamType.SNOOZE_MODE].value == {"enable": 0}
+        await api.async_close()
@@ -0,0 +1,160 @@
+"""Define tests for circuit breakers."""
+import json
+import time
+
+import aiohttp
+from aiohttp.client_exceptions import ClientResponseError
+import pytest
+
+from eufy_security.api import API
+from eufy_security.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    is_failure,
+)
+from eufy_security.errors import (
+    CircuitOpenError,
+    ConnectError,
+    InvalidCredentialsError,
+    ServerError,
+)
+
+from .common import TEST_EMAIL, TEST_PASSWORD, load_fixture
+
+
+def _open(breaker):
+    """Record enough failures to open the breaker."""
+    for _ in range(breaker.failure_threshold):
+        breaker.record(ServerError("Server error"))
+
+
+def test_is_failure():
+    """Test classifying errors as server failures."""
+    assert is_failure(ServerError("Server error"))
+    assert is_failure(ConnectError("Connect error"))
+    assert is_failure(aiohttp.ClientConnectionError())
+    assert is_failure(ClientResponseError(None, (), status=502))
+    assert not is_failure(ClientResponseError(None, (), status=401))
+    assert not is_failure(InvalidCredentialsError("Bad token"))
+    assert not is_failure(None)
+
+
+def test_consecutive_failures_open_circuit():
+    """Test that consecutive failures open the circuit."""
+    breaker = CircuitBreaker("base", failure_threshold=3)
+    breaker.record(ServerError("Server error"))
+    breaker.record(ServerError("Server error"))
+    breaker.record(None)
+    breaker.record(ServerError("Server error"))
+    assert breaker.state == STATE_CLOSED
+
+    _open(breaker)
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_error_rate_opens_circuit():
+    """Test that a high error rate opens the circuit."""
+    breaker = CircuitBreaker("base", failure_threshold=100, window=4, min_calls=4)
+    for err in [None, ServerError("Server error"), None]:
+        breaker.record(err)
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record(ServerError("Server error"))
+    assert breaker.state == STATE_OPEN
+
+
+def test_half_open_probe():
+    """Test that a single probe decides whether the circuit closes."""
+    breaker = CircuitBreaker("base", failure_threshold=1, recovery_timeout=10)
+    _open(breaker)
+    breaker._opened_at = time.monotonic() - 10
+    assert breaker.state == STATE_HALF_OPEN
+
+    assert breaker.acquire()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.record(ServerError("Server error"), probe=True)
+    assert breaker.state == STATE_OPEN
+    assert breaker.opened == 2
+
+    breaker._opened_at = time.monotonic() - 10
+    assert breaker.acquire()
+    breaker.record(None, probe=True)
+    assert breaker.state == STATE_CLOSED
+    assert not breaker.acquire()
+
+
+def test_half_open_ignores_other_requests():
+    """Test that only the probe outcome closes a half-open circuit."""
+    breaker = CircuitBreaker("base", failure_threshold=1, recovery_timeout=10)
+    _open(breaker)
+    breaker._opened_at = time.monotonic() - 10
+    assert breaker.acquire()
+
+    # A request that started before the circuit opened finishes:
+    breaker.record(None)
+    assert breaker.state == STATE_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.record(None, probe=True)
+    assert breaker.state == STATE_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_api_fails_fast(aresponses, login_success_response):
+    """Test that the API fails fast while the circuit is open."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(
+            text=json.dumps({"code": 999, "msg": "Server error"}), status=200
+        ),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_hub_list",
+        "post",
+        aresponses.Response(text=load_fixture("hub_list_response.json"), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=load_fixture("history_response.json"), status=200),
+    )
+
+    breakers = CircuitBreakers(failure_threshold=1, recovery_timeout=10)
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, circuit_breakers=breakers)
+        await api.async_authenticate()
+
+        with pytest.raises(ServerError):
+            await api.async_get_history()
+        with pytest.raises(CircuitOpenError):
+            await api.async_get_history()
+
+        breaker = breakers.get("https://security-app.eufylife.com/v1")
+        breaker._opened_at = time.monotonic() - 10
+        history = await api.async_get_history()
+        assert len(history) == 2
+        assert breaker.state == STATE_CLOSED
+        await api.async_close()
+
+    snapshot = breakers.snapshot()
+    assert snapshot["https://security-app.eufylife.com/v1"]["opened"] == 1
+    assert snapshot["https://mysecurity.eufylife.com/api/v1"]["state"] == STATE_CLOSED
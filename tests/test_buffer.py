@@ -0,0 +1,231 @@
+"""Define tests for the param write buffer."""
+import asyncio
+import json
+
+import aiohttp
+import pytest
+
+from eufy_security.api import API
+from eufy_security.buffer import ParamWriteBuffer
+from eufy_security.device import Device
+from eufy_security.types import ParamType
+
+from .common import TEST_EMAIL, TEST_PASSWORD, load_fixture, load_json_fixture
+
+
+def _device(serial):
+    """Return a device with the given serial."""
+    return Device(None, {"device_sn": serial, "station_sn": "station"})
+
+
+@pytest.mark.asyncio
+async def test_writes_are_merged():
+    """Test that writes within the window are uploaded together."""
+    uploads = []
+
+    async def upload(device, data):
+        uploads.append((device.serial, data))
+
+    buffer = ParamWriteBuffer(upload, window=0.01)
+    device1 = _device("device1")
+    device2 = _device("device2")
+    await asyncio.gather(
+        buffer.async_set_params(device1, {ParamType.GUARD_MODE: "AWAY"}),
+        buffer.async_set_params(device1, {"DETECT_SWITCH": 1}),
+        buffer.async_set_params(device2, {ParamType.DETECT_SWITCH: 1}),
+        buffer.async_set_params(device1, {ParamType.GUARD_MODE: "HOME"}),
+    )
+    assert sorted(uploads) == [
+        ("device1", {ParamType.GUARD_MODE: "HOME", ParamType.DETECT_SWITCH: 1},),
+        ("device2", {ParamType.DETECT_SWITCH: 1}),
+    ]
+    assert buffer.writes == 4
+    assert buffer.flushes == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_error_is_shared():
+    """Test that every caller of a failed upload gets its error."""
+
+    async def upload(device, data):
+        raise ValueError("boom")
+
+    buffer = ParamWriteBuffer(upload, window=0)
+    device = _device("device1")
+    results = await asyncio.gather(
+        buffer.async_set_params(device, {ParamType.DETECT_SWITCH: 1}),
+        buffer.async_set_params(device, {ParamType.DETECT_SWITCH: 0}),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_uploads_do_not_overlap():
+    """Test that a device's next upload waits for the previous one."""
+    uploads = []
+    release = asyncio.Event()
+
+    async def upload(device, data):
+        uploads.append(data)
+        if len(uploads) == 1:
+            await release.wait()
+
+    buffer = ParamWriteBuffer(upload, window=0)
+    device = _device("device1")
+    first = asyncio.ensure_future(
+        buffer.async_set_params(device, {ParamType.DETECT_SWITCH: 1})
+    )
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(
+        buffer.async_set_params(device, {ParamType.DETECT_SWITCH: 0})
+    )
+    await asyncio.sleep(0.01)
+    assert len(uploads) == 1
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert uploads == [{ParamType.DETECT_SWITCH: 1}, {ParamType.DETECT_SWITCH: 0}]
+
+
+@pytest.mark.asyncio
+async def test_flush():
+    """Test that pending writes can be uploaded immediately."""
+    uploads = []
+
+    async def upload(device, data):
+        uploads.append(data)
+
+    buffer = ParamWriteBuffer(upload, window=60)
+    write = asyncio.ensure_future(
+        buffer.async_set_params(_device("device1"), {ParamType.DETECT_SWITCH: 1})
+    )
+    await asyncio.sleep(0)
+    await buffer.async_flush()
+    await write
+    assert uploads == [{ParamType.DETECT_SWITCH: 1}]
+
+
+@pytest.mark.asyncio
+async def test_api_write_buffer(aresponses, login_success_response):
+    """Test that the API merges writes into one upload."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    async def upload(request):
+        """Check the uploaded params."""
+        body = await request.json()
+        assert sorted(param["param_type"] for param in body["params"]) == [
+            ParamType.GUARD_MODE.value,
+            ParamType.DETECT_SWITCH.value,
+        ]
+        return aresponses.Response(
+            text=load_fixture("upload_devs_params_response.json"), status=200
+        )
+
+    aresponses.add(
+        "security-app.eufylife.com", "/v1/app/upload_devs_params", "post", upload
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, write_buffer_window=0.01)
+        await api.async_authenticate()
+        api.devices.update(load_json_fixture("devices_list_response.json")["data"])
+        device = next(iter(api.devices.values()))
+
+        await asyncio.gather(
+            device.async_set_params({ParamType.GUARD_MODE: "AWAY"}),
+            device.async_start_detection(),
+        )
+        assert api.write_buffer.flushes == 1
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_api_write_buffer_only_changed(aresponses, login_success_response):
+    """Test that a later unchanged value replaces a pending write."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, write_buffer_window=0.05)
+        await api.async_authenticate()
+        api.devices.update(load_json_fixture("devices_list_response.json")["data"])
+        device = next(iter(api.devices.values()))
+        assert device.params[ParamType.CAMERA_PIR].value is True
+
+        first = asyncio.ensure_future(
+            device.async_set_params({ParamType.CAMERA_PIR: 0})
+        )
+        second = asyncio.ensure_future(
+            device.async_set_params({ParamType.CAMERA_PIR: True}, only_changed=True)
+        )
+        await asyncio.sleep(0.01)
+        assert not second.done()
+
+        # The newest value is what the device already has, so nothing is sent:
+        await asyncio.gather(first, second)
+        assert api.write_buffer.writes == 2
+        assert api.write_buffer.flushes == 0
+        assert device.params[ParamType.CAMERA_PIR].value is True
+        await api.async_close()
+
+
+@pytest.mark.asyncio
+async def test_only_changed_is_compared_when_uploading():
+    """Test that only_changed writes are compared with the merged writes."""
+    uploads = []
+
+    async def upload(device, data):
+        uploads.append(data)
+
+    buffer = ParamWriteBuffer(upload, window=0.01)
+    device = Device(
+        None,
+        {
+            "device_sn": "device1",
+            "station_sn": "station",
+            "params": [
+                {"param_type": ParamType.CAMERA_PIR.value, "param_value": "1"},
+                {"param_type": ParamType.DETECT_SWITCH.value, "param_value": "1"},
+            ],
+        },
+    )
+    await asyncio.gather(
+        buffer.async_set_params(device, {ParamType.CAMERA_PIR: 1}),
+        buffer.async_set_params(device, {ParamType.CAMERA_PIR: 0}, only_changed=True),
+        buffer.async_set_params(
+            device, {ParamType.DETECT_SWITCH: 1}, only_changed=True
+        ),
+    )
+    assert uploads == [{ParamType.CAMERA_PIR: 0}]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_flush():
+    """Test that callers of a cancelled upload don't wait forever."""
+    started = asyncio.Event()
+
+    async def upload(device, data):
+        started.set()
+        await asyncio.sleep(60)
+
+    buffer = ParamWriteBuffer(upload, window=60)
+    write = asyncio.ensure_future(
+        buffer.async_set_params(_device("device1"), {ParamType.DETECT_SWITCH: 1})
+    )
+    await asyncio.sleep(0)
+    flush = asyncio.ensure_future(buffer.async_flush())
+    await started.wait()
+    flush.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(write, 1)
@@ -0,0 +1,62 @@
+"""Define tests for columnar history records."""
+import pytest
+
+from eufy_security.columns import MISSING, HistoryColumns
+from eufy_security.events import Event
+
+from .common import load_json_fixture
+
+
+def test_from_records():
+    """Test creating columns from records and events."""
+    records = load_json_fixture("history_response.json")["data"]
+    columns = HistoryColumns.from_records(
+        [*records, Event(None, records[0]), {"monitor_id": 1}]
+    )
+    assert len(columns) == 4
+    assert list(columns["start_time"]) == [
+        records[0]["start_time"],
+        records[1]["start_time"],
+        records[0]["start_time"],
+        MISSING,
+    ]
+    assert list(columns["has_human"]) == [0, 1, 0, MISSING]
+    assert columns.device_sns == [records[0]["device_sn"]]
+    assert list(columns["device"]) == [0, 0, 0, MISSING]
+    assert list(columns["frame_num"])[:2] == [119, records[1]["frame_num"]]
+
+
+def test_save_and_load(tmp_path):
+    """Test writing columns and memory-mapping them back."""
+    records = load_json_fixture("history_response.json")["data"]
+    records = [
+        {**record, "monitor_id": index, "device_sn": f"device{index % 3}"}
+        for index, record in enumerate(records * 5)
+    ]
+    columns = HistoryColumns.from_records(records)
+    path = str(tmp_path / "history.col")
+    columns.save(path)
+
+    loaded = HistoryColumns.load(path)
+    assert len(loaded) == 10
+    for name, column in columns.columns.items():
+        assert list(loaded[name]) == list(column)
+    assert loaded.device_sns == ["device0", "device1", "device2"]
+    with pytest.raises(ValueError):
+        loaded.extend(records)
+    loaded.close()
+    assert len(loaded) == 0
+
+    with open(path, "r+b") as fptr:
+        fptr.write(b"NOTCOLS!")
+    with pytest.raises(ValueError):
+        HistoryColumns.load(path)
+
+
+def test_to_numpy():
+    """Test converting columns to a NumPy structured array."""
+    numpy = pytest.importorskip("numpy")
+    records = load_json_fixture("history_response.json")["data"]
+    array = HistoryColumns.from_records(records).to_numpy()
+    assert array["start_time"].tolist() == [record["start_time"] for record in records]
+    assert numpy.count_nonzero(array["has_human"]) == 1
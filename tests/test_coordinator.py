@@ -0,0 +1,59 @@
+"""Define tests for the refresh coordinator."""
+import asyncio
+
+import pytest
+
+from eufy_security.coordinator import RefreshCoordinator
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_are_shared():
+    """Test that concurrent callers share a single refresh."""
+    calls = []
+
+    async def refresh():
+        calls.append(None)
+        await asyncio.sleep(0)
+
+    coordinator = RefreshCoordinator(refresh)
+    await asyncio.gather(*[coordinator.async_refresh() for _ in range(40)])
+    assert len(calls) == 1
+    assert coordinator.requested == 40
+    assert coordinator.performed == 1
+    assert coordinator.saved == 39
+
+
+@pytest.mark.asyncio
+async def test_window_debounces_refreshes():
+    """Test that callers arriving inside the window join the pending refresh."""
+    calls = []
+
+    async def refresh():
+        calls.append(None)
+
+    coordinator = RefreshCoordinator(refresh, window=0.01)
+    first = asyncio.ensure_future(coordinator.async_refresh())
+    await asyncio.sleep(0)
+    await coordinator.async_refresh()
+    await first
+    assert len(calls) == 1
+
+    await coordinator.async_refresh()
+    assert len(calls) == 2
+    assert coordinator.saved == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_error_is_shared():
+    """Test that a failed refresh raises for every waiting caller."""
+
+    async def refresh():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    coordinator = RefreshCoordinator(refresh)
+    results = await asyncio.gather(
+        coordinator.async_refresh(), coordinator.async_refresh(), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert coordinator.performed == 1
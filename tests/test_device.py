@@ -1,16 +1,36 @@
 """Define tests for devices."""
 import json
+import tracemalloc
 
 import aiohttp
 import pytest
 
 from eufy_security import async_login
-from eufy_security.device import Device, DeviceDict
+from eufy_security.api import API
+from eufy_security.device import (
+    CompactDevice,
+    CompactStation,
+    Device,
+    DeviceDict,
+    StationDict,
+    pack_params,
+    unpack_params,
+)
 from eufy_security.types import DeviceType, ParamType
 
 from .common import TEST_EMAIL, TEST_PASSWORD, load_fixture, load_json_fixture
 
 
+def test_type_is_cached():
+    """Test the device type is resolved once and follows updates."""
+    device = Device(None, {"device_type": DeviceType.CAMERA.value})
+    assert device.type is device.type
+    assert device.type == DeviceType.CAMERA
+
+    device.update({"device_type": DeviceType.STATION.value})
+    assert device.type == DeviceType.STATION
+
+
 def test_properties():
     """Test device properties."""
     device_info = load_json_fixture("devices_list_response.json")["data"][0]
@@ -258,8 +278,398 @@ def test_device_dict_with_list():
     assert dd["xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx1"].name == "Updated"
 
 
+def test_device_dict_reconcile():
+    """Test updating DeviceDict with a list removes missing devices."""
+    device_infos = load_json_fixture("devices_list_response.json")["data"]
+    serials = {device_info["device_sn"] for device_info in device_infos}
+    dd = DeviceDict(None)
+    changes = dd.update(device_infos)
+    assert changes == (1, serials, set(), set(), {}, {})
+    assert dd.changes is changes
+
+    first, *others = device_infos
+    changes = dd.update(
+        [{**device_info, "device_name": "Updated"} for device_info in others]
+    )
+    assert changes.generation == 2
+    assert changes.added == set()
+    assert changes.removed == {first["device_sn"]}
+    assert changes.changed == serials - {first["device_sn"]}
+    assert changes.fields == {
+        serial: ["device_name"] for serial in serials - {first["device_sn"]}
+    }
+    assert changes.params == {}
+    assert set(dd) == serials - {first["device_sn"]}
+
+    changes = dd.update(device_infos)
+    assert changes.added == {first["device_sn"]}
+    assert changes.changed == serials - {first["device_sn"]}
+    assert dd.generation == 3
+
+    changes = dd.update(device_infos)
+    assert changes == (4, set(), set(), set(), {}, {})
+
+
+def test_device_dict_with_dict_keeps_devices():
+    """Test updating DeviceDict with a dict doesn't remove devices."""
+    device_infos = load_json_fixture("devices_list_response.json")["data"]
+    dd = DeviceDict(None)
+    dd.update(device_infos)
+
+    first = device_infos[0]
+    changes = dd.update({first["device_sn"]: {"device_name": "Updated"}})
+    assert changes.removed == set()
+    assert changes.changed == {first["device_sn"]}
+    assert len(dd) == len(device_infos)
+
+
+def test_device_dict_changed_params():
+    """Test DeviceDict reports changed params."""
+    device_infos = load_json_fixture("devices_list_response.json")["data"]
+    dd = DeviceDict(None)
+    dd.update(device_infos)
+
+    first = device_infos[0]
+    param_infos = [
+        (
+            {**param_info, "param_value": "changed"}
+            if param_info["param_type"] == first["params"][0]["param_type"]
+            else param_info
+        )
+        for param_info in first["params"][1:]
+    ]
+    changes = dd.update({first["device_sn"]: {**first, "params": param_infos}})
+    assert changes.fields == {first["device_sn"]: ["params"]}
+    assert changes.params == {first["device_sn"]: {first["params"][0]["param_type"]}}
+
+
+def test_update_skips_same_device_info():
+    """Test devices skip device info they were last updated with."""
+    device_info = load_json_fixture("devices_list_response.json")["data"][0]
+    device = Device(None, json.loads(json.dumps(device_info)))
+    params = device.params
+    assert device.update(json.loads(json.dumps(device_info))) == []
+    assert device.params is params
+
+    device.apply_params(
+        [{"param_type": ParamType.CAMERA_IR_CUT.value, "param_value": "0"}]
+    )
+    assert device.update(json.loads(json.dumps(device_info))) == ["params"]
+    assert device.pending_params == {}
+    assert device.params[ParamType.CAMERA_IR_CUT].value == 1
+
+
+def test_station_dict_reconcile():
+    """Test StationDict keys stations by station serial."""
+    station_infos = load_json_fixture("hub_list_response.json")["data"]
+    stations = StationDict(None)
+    changes = stations.update(station_infos)
+    assert changes.added == {
+        station_info["station_sn"] for station_info in station_infos
+    }
+
+    changes = stations.update([])
+    assert changes.removed == {
+        station_info["station_sn"] for station_info in station_infos
+    }
+    assert not stations
+
+
 def test_device_dict_with_none():
     """Test updating DeviceDict with None."""
     dd = DeviceDict(None)
     with pytest.raises(TypeError):
         dd.update(None)
+
+
+def test_apply_params():
+    """Test applying uploaded params to the local device info."""
+    device_info = load_json_fixture("devices_list_response.json")["data"][0]
+    device = Device(None, device_info)
+    assert device.params[ParamType.CAMERA_SPEAKER_VOLUME].value == 100
+
+    device.apply_params(
+        [
+            {"param_type": ParamType.CAMERA_SPEAKER_VOLUME.value, "param_value": "50"},
+            {"param_type": ParamType.CHIME_STATE.value, "param_value": "1"},
+        ]
+    )
+    assert device.params[ParamType.CAMERA_SPEAKER_VOLUME].value == 50
+    assert device.params[ParamType.CAMERA_SPEAKER_VOLUME].updated.year > 2019
+    assert device.params[ParamType.CHIME_STATE].value == 1
+    assert device.pending_params == {
+        ParamType.CAMERA_SPEAKER_VOLUME: "50",
+        ParamType.CHIME_STATE: "1",
+    }
+
+
+def test_confirm_params():
+    """Test that params read back from the API resolve pending params."""
+    device_info = load_json_fixture("devices_list_response.json")["data"][0]
+    device = Device(None, device_info)
+    device.apply_params(
+        [
+            {"param_type": ParamType.CAMERA_SPEAKER_VOLUME.value, "param_value": "50"},
+            {"param_type": ParamType.CAMERA_IR_CUT.value, "param_value": "0"},
+            {"param_type": ParamType.CHIME_STATE.value, "param_value": "1"},
+        ]
+    )
+
+    params = [
+        {"param_type": ParamType.CAMERA_SPEAKER_VOLUME.value, "param_value": "50"},
+        {"param_type": ParamType.CAMERA_IR_CUT.value, "param_value": "1"},
+    ]
+    device.update({"params": params})
+    assert device.pending_params == {ParamType.CHIME_STATE: "1"}
+    assert device.params[ParamType.CAMERA_IR_CUT].value == 1
+
+
+@pytest.mark.asyncio
+async def test_async_refresh(aresponses, login_success_response):
+    """Test refreshing a single device."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_devs_list",
+        "post",
+        aresponses.Response(
+            text=load_fixture("devices_list_response.json"), status=200
+        ),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_hub_list",
+        "post",
+        aresponses.Response(text=load_fixture("hub_list_response.json"), status=200),
+    )
+
+    async def dev_info(request):
+        """Check the requested device."""
+        assert await request.json() == {
+            "account": login_success_response["data"]["user_id"],
+            "device_sn": "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx1",
+            "station_sn": "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx",
+        }
+        return aresponses.Response(
+            text=load_fixture("dev_info_response.json"), status=200
+        )
+
+    aresponses.add(
+        "security-app.eufylife.com", "/v1/hub/get_dev_info", "post", dev_info
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = await async_login(TEST_EMAIL, TEST_PASSWORD, websession)
+        device = api.devices["xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx1"]
+        await device.async_refresh()
+        assert device.name == "Front Yard"
+        assert api.devices["xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx2"].name != "Front Yard"
+
+
+@pytest.mark.asyncio
+async def test_async_refresh_params(aresponses, login_success_response):
+    """Test refreshing some params of a single device."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_devs_list",
+        "post",
+        aresponses.Response(
+            text=load_fixture("devices_list_response.json"), status=200
+        ),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/get_hub_list",
+        "post",
+        aresponses.Response(text=load_fixture("hub_list_response.json"), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/hub/get_devs_params",
+        "post",
+        aresponses.Response(text=load_fixture("devs_params_response.json"), status=200),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = await async_login(TEST_EMAIL, TEST_PASSWORD, websession)
+        device = api.devices["xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx1"]
+        param_count = len(device.device_info["params"])
+        device.apply_params(
+            [{"param_type": ParamType.CAMERA_PIR.value, "param_value": "0"}]
+        )
+
+        await device.async_refresh_params([ParamType.CAMERA_WIFI_RSSI])
+        assert device.params[ParamType.CAMERA_WIFI_RSSI].value == -50
+        assert device.params[ParamType.CAMERA_SPEAKER_VOLUME].value == 100
+        assert device.params[ParamType.CAMERA_PIR].value is False
+        assert device.pending_params == {ParamType.CAMERA_PIR: "0"}
+        assert len(device.device_info["params"]) == param_count
+
+
+def test_params_cache():
+    """Test that params are cached until the device info changes them."""
+    device_info = load_json_fixture("devices_list_response.json")["data"][0]
+    device = Device(None, device_info)
+    params = device.params
+    assert device.params is params
+
+    device.update({**device_info, "device_name": "Updated"})
+    assert device.params is params
+
+    device.update(
+        {"params": [{"param_type": ParamType.CAMERA_PIR.value, "param_value": "0"},]}
+    )
+    assert device.params is not params
+    assert len(device.params) == 1
+
+    params = device.params
+    device.apply_params(
+        [{"param_type": ParamType.CAMERA_PIR.value, "param_value": "1"}]
+    )
+    assert device.params is not params
+    assert device.params[ParamType.CAMERA_PIR].value is True
+
+
+def test_compact_device_properties():
+    """Test compact devices expose the same properties as devices."""
+    device_info = load_json_fixture("devices_list_response.json")["data"][0]
+    device = Device(None, device_info)
+    compact = CompactDevice(None, device_info)
+    for name in (
+        "hardware_version",
+        "is_camera",
+        "last_camera_image_url",
+        "mac",
+        "model",
+        "name",
+        "serial",
+        "software_version",
+        "station_serial",
+        "type",
+    ):
+        assert getattr(compact, name) == getattr(device, name)
+    assert compact.params.items().keys() == device.params.items().keys()
+    assert compact.device_info == device_info
+    assert compact.device_info["params"] is not device_info["params"]
+    assert not hasattr(compact, "__dict__")
+
+    compact.update({"device_name": "Updated", "event_num": 1})
+    assert compact.name == "Updated"
+    assert compact.device_info["event_num"] == 1
+
+    dropped = CompactDevice(None, device_info, keep_extras=False)
+    assert dropped.name == device.name
+    assert "station_conn" not in dropped.device_info
+    assert dropped.device_info["params"] == device_info["params"]
+
+    with pytest.raises(KeyError):
+        CompactDevice(None, {}).serial
+
+
+def test_compact_station_properties():
+    """Test compact stations expose the same properties as stations."""
+    station_info = load_json_fixture("hub_list_response.json")["data"][0]
+    stations = StationDict(None, compact=True)
+    stations.update([station_info])
+    station = stations[station_info["station_sn"]]
+    assert isinstance(station, CompactStation)
+    assert not hasattr(station, "__dict__")
+    assert station.serial == station_info["station_sn"]
+    assert station.model == station_info["station_model"]
+    assert station.name == station_info["station_name"]
+
+
+def test_compact_device_params():
+    """Test compact devices apply and merge params."""
+    param_type = ParamType.DETECT_SWITCH.value
+    device = CompactDevice(
+        None,
+        {
+            "device_sn": "xxx",
+            "params": [{"param_type": param_type, "param_value": "1"}],
+        },
+    )
+    device.apply_params([{"param_type": param_type, "param_value": "0"}])
+    assert device.params[ParamType.DETECT_SWITCH].value == 0
+    assert device.pending_params == {ParamType.DETECT_SWITCH: "0"}
+
+    device.update_params([{"param_type": param_type, "param_value": "0"}])
+    assert device.pending_params == {}
+    assert device.params[ParamType.DETECT_SWITCH].value == 0
+
+
+def test_pack_params():
+    """Test packing params into tuples and back."""
+    param_infos = load_json_fixture("devices_list_response.json")["data"][0]["params"]
+    packed = pack_params(param_infos)
+    assert unpack_params(packed) == param_infos
+    assert packed[0][0] is packed[1][0]
+    assert packed[0][1][1] is packed[1][1][1]
+
+
+def test_device_attributes():
+    """Test that devices still accept attributes of their own."""
+    device = Device(None, {"device_sn": "xxx"})
+    device.entity_id = "camera.driveway"
+    assert device.entity_id == "camera.driveway"
+
+
+def test_compact_device_memory():
+    """Test compact devices use less memory per device."""
+    raw = json.dumps(load_json_fixture("devices_list_response.json")["data"][0])
+
+    def measure(create) -> float:
+        """Return the memory each device keeps."""
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            devices = [create(json.loads(raw)) for _ in range(100)]
+            size = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+        assert len(devices) == 100
+        return size / 100
+
+    full = measure(lambda device_info: Device(None, device_info))
+    compact = measure(lambda device_info: CompactDevice(None, device_info))
+    dropped = measure(
+        lambda device_info: CompactDevice(None, device_info, keep_extras=False)
+    )
+    # Packed params alone save about a quarter; dropping the extras two thirds:
+    assert compact < full * 0.8, (full, compact)
+    assert dropped < full * 0.4, (full, dropped)
+
+
+def test_device_dict_compact():
+    """Test DeviceDict creating compact devices."""
+    device_infos = load_json_fixture("devices_list_response.json")["data"]
+    devices = DeviceDict(None, compact=True, keep_extras=False)
+    devices.update(device_infos)
+    assert all(type(device) == CompactDevice for device in devices.values())
+
+    devices.update({device_infos[0]["device_sn"]: {"device_name": "Updated"}})
+    assert devices[device_infos[0]["device_sn"]].name == "Updated"
+
+
+def test_api_compact_devices():
+    """Test the API creating compact devices without extras."""
+    api = API(
+        TEST_EMAIL, TEST_PASSWORD, None, compact_devices=True, keep_device_extras=False
+    )
+    api.devices.update(load_json_fixture("devices_list_response.json")["data"])
+    api.stations.update(load_json_fixture("hub_list_response.json")["data"])
+    device = next(iter(api.devices.values()))
+    assert isinstance(device, CompactDevice)
+    assert "station_conn" not in device.device_info
+    assert all(isinstance(station, CompactStation) for station in api.stations.values())
@@ -0,0 +1,151 @@
+"""Define tests for history events and the local history record store."""
+from datetime import datetime, timezone
+import json
+import tracemalloc
+
+import aiohttp
+import pytest
+
+from eufy_security.api import API
+from eufy_security.events import Event, EventStore
+
+from .common import TEST_EMAIL, TEST_PASSWORD, load_fixture, load_json_fixture
+
+
+def make_records(count: int) -> list:
+    """Return history records on two devices, one minute apart."""
+    record = load_json_fixture("history_response.json")["data"][0]
+    return [
+        {
+            **record,
+            "monitor_id": index,
+            "device_sn": f"device{index % 2}",
+            "has_human": int(index % 3 == 0),
+            "start_time": 1572287416000 + index * 60000,
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_upsert_and_query(tmp_path):
+    """Test storing and querying records."""
+    records = make_records(10)
+    store = EventStore(str(tmp_path / "events.db"), batch_size=3)
+    assert await store.async_upsert(records) == 10
+
+    assert await store.async_query() == sorted(
+        records, key=lambda record: record["start_time"], reverse=True
+    )
+    assert [
+        record["monitor_id"]
+        for record in await store.async_query(device_sn="device0", has_human=True)
+    ] == [6, 0]
+    assert [
+        record["monitor_id"]
+        for record in await store.async_query(device_sn="device1", limit=1)
+    ] == [9]
+    assert [
+        record["monitor_id"]
+        for record in await store.async_query(has_human=False, limit=2)
+    ] == [8, 7]
+    assert [
+        record["monitor_id"]
+        for record in await store.async_query(
+            start_time=records[2]["start_time"] // 1000,
+            end_time=datetime.fromtimestamp(
+                records[4]["start_time"] / 1000, timezone.utc
+            ),
+        )
+    ] == [3, 2]
+    assert len(await store.async_query(station_sn=records[0]["station_sn"])) == 10
+
+    # Records are replaced by monitor id:
+    await store.async_upsert([{**records[0], "device_name": "Updated"}])
+    assert (
+        await store.async_query(limit=1, end_time=records[1]["start_time"] // 1000)
+    )[0]["device_name"] == "Updated"
+    await store.async_close()
+
+    # The records are still there after reopening:
+    store = EventStore(str(tmp_path / "events.db"))
+    assert len(await store.async_query()) == 10
+    await store.async_close()
+
+
+def test_event():
+    """Test event properties."""
+    record = load_json_fixture("history_response.json")["data"][0]
+    event = Event(None, record)
+    assert event.monitor_id == 128428371
+    assert event.device_sn == record["device_sn"]
+    assert event.start == datetime(2019, 10, 28, 18, 30, 16, 88000, timezone.utc)
+    assert event.end == datetime(2019, 10, 28, 18, 30, 26, 100000, timezone.utc)
+    assert event.created == datetime(2019, 10, 28, 18, 30, 30, tzinfo=timezone.utc)
+    assert event.frame_num == 119
+    assert not event.is_person
+    assert event.name == "Driveway"
+    assert event.thumbnail_url == "https://path/to/image.jpg"
+    assert event.device is None
+    assert not hasattr(event, "__dict__")
+
+    kept = event.record
+    assert "p2p_license" not in kept
+    assert {key: record[key] for key in kept} == kept
+
+    other = Event(None, json.loads(json.dumps(record)))
+    assert other.device_sn is event.device_sn
+
+
+def test_event_memory():
+    """Test events use less memory than history records."""
+    raw = json.dumps(load_json_fixture("history_response.json")["data"][0])
+
+    def measure(create) -> float:
+        """Return the memory each event keeps."""
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            events = [create(json.loads(raw)) for _ in range(100)]
+            size = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+        assert len(events) == 100
+        return size / 100
+
+    records = measure(lambda record: record)
+    events = measure(lambda record: Event(None, record))
+    assert events < records / 2, (records, events)
+
+
+@pytest.mark.asyncio
+async def test_get_events(aresponses, login_success_response):
+    """Test getting the device history as events."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    for _ in range(2):
+        aresponses.add(
+            "security-app.eufylife.com",
+            "/v1/event/app/get_all_history_record",
+            "post",
+            aresponses.Response(text=load_fixture("history_response.json"), status=200),
+        )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        device_info = load_json_fixture("devices_list_response.json")["data"][0]
+        record = load_json_fixture("history_response.json")["data"][0]
+        api.devices.update([{**device_info, "device_sn": record["device_sn"]}])
+
+        events = await api.async_get_events()
+        assert len(events) == 2
+        assert events[0].device is api.devices[events[0].device_sn]
+
+        events = [event async for event in api.async_iter_events(page_size=100)]
+        assert [event.monitor_id for event in events] == [128428371, 128340343]
+        await api.async_close()
@@ -0,0 +1,96 @@
+"""Define tests for the incremental history sync."""
+import json
+
+import aiohttp
+import pytest
+
+from eufy_security.api import API
+from eufy_security.history import HistorySync
+from eufy_security.store import MemoryStore
+
+from .common import TEST_EMAIL, TEST_PASSWORD, load_json_fixture
+
+
+def add_history(aresponses, login_success_response, records, bodies):
+    """Serve history records like the API, newest first."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    async def history(request):
+        """Return a page of history records."""
+        body = await request.json()
+        bodies.append(body)
+        data = sorted(
+            (
+                record
+                for record in records
+                if record["create_time"] >= body["start_time"]
+                and (not body["id"] or record["monitor_id"] < body["id"])
+            ),
+            key=lambda record: record["monitor_id"],
+            reverse=True,
+        )[: body["num"]]
+        return aresponses.Response(
+            text=json.dumps({"code": 0, "msg": "Succeed.", "data": data}), status=200
+        )
+
+    for _ in range(10):
+        aresponses.add(
+            "security-app.eufylife.com",
+            "/v1/event/app/get_all_history_record",
+            "post",
+            history,
+        )
+
+
+def make_record(monitor_id: int, create_time: int) -> dict:
+    """Return a history record."""
+    record = load_json_fixture("history_response.json")["data"][0]
+    return {**record, "monitor_id": monitor_id, "create_time": create_time}
+
+
+@pytest.mark.asyncio
+async def test_sync(aresponses, login_success_response):
+    """Test that syncs only return new records."""
+    records = [make_record(1, 1000), make_record(2, 2000)]
+    bodies = []
+    add_history(aresponses, login_success_response, records, bodies)
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        store = MemoryStore()
+        sync = HistorySync(api, device_sn="xxx", overlap=300, store=store)
+
+        new = await sync.async_sync()
+        assert [record["monitor_id"] for record in new] == [2, 1]
+        assert bodies[-1]["start_time"] == 0
+        assert bodies[-1]["device_sn"] == "xxx"
+        assert (sync.create_time, sync.monitor_id) == (2000, 2)
+
+        # Nothing new, although the overlap returns record 2 again:
+        assert await sync.async_sync() == []
+        assert bodies[-1]["start_time"] == 1700
+
+        # A late record within the overlap and a new one:
+        records += [make_record(3, 1900), make_record(4, 2100)]
+        new = await sync.async_sync()
+        assert [record["monitor_id"] for record in new] == [4, 3]
+        assert (sync.create_time, sync.monitor_id) == (2100, 4)
+
+        # A restart resumes from the checkpoint:
+        records.append(make_record(5, 2200))
+        resumed = HistorySync(api, device_sn="xxx", overlap=300, store=store)
+        new = await resumed.async_sync()
+        assert [record["monitor_id"] for record in new] == [5]
+        assert bodies[-1]["start_time"] == 1800
+        assert (await store.async_load("history_xxx"))["monitor_id"] == 5
+
+        await resumed.async_reset()
+        assert await store.async_load("history_xxx") is None
+        assert len(await resumed.async_sync()) == 5
+        await api.async_close()
@@ -0,0 +1,157 @@
+"""Define tests for the request limiter."""
+import asyncio
+import json
+
+import aiohttp
+from aiohttp.client_exceptions import ClientResponseError
+import pytest
+
+from eufy_security.api import API
+from eufy_security.errors import RequestError, ServerError
+from eufy_security.limiter import (
+    AIMDLimiter,
+    RequestLimiter,
+    TokenBucket,
+    endpoint_family,
+    is_overload,
+)
+
+from .common import TEST_EMAIL, TEST_PASSWORD, load_fixture
+
+
+def test_endpoint_family():
+    """Test getting the family of an endpoint."""
+    assert endpoint_family("app/get_devs_list") == "app"
+    assert endpoint_family("passport/login") == "passport"
+
+
+def test_is_overload():
+    """Test classifying errors as server overload."""
+    assert is_overload(ServerError("Server error"))
+    assert is_overload(asyncio.TimeoutError())
+    assert is_overload(ClientResponseError(None, (), status=503))
+    assert is_overload(ClientResponseError(None, (), status=429))
+    assert not is_overload(ClientResponseError(None, (), status=401))
+    assert not is_overload(RequestError("Empty response"))
+
+
+@pytest.mark.asyncio
+async def test_token_bucket():
+    """Test that the bucket throttles once the burst is used up."""
+    bucket = TokenBucket(rate=1000, capacity=2)
+    await bucket.async_acquire()
+    await bucket.async_acquire()
+    assert bucket.throttled == 0
+
+    await bucket.async_acquire()
+    assert bucket.throttled == 1
+    assert bucket.snapshot()["tokens"] < 1
+
+
+@pytest.mark.asyncio
+async def test_aimd_limits_concurrency():
+    """Test that callers wait for a free slot."""
+    limiter = AIMDLimiter(initial=2)
+    await limiter.async_acquire()
+    await limiter.async_acquire()
+
+    waiter = asyncio.ensure_future(limiter.async_acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    assert limiter.snapshot()["waiting"] == 1
+
+    limiter.release(None)
+    await waiter
+    assert limiter.in_flight == 2
+    assert limiter.throttled == 1
+
+
+@pytest.mark.asyncio
+async def test_aimd_adjusts_limit():
+    """Test that the limit shrinks on overload and grows on success."""
+    limiter = AIMDLimiter(initial=8, minimum=1, cooldown=0)
+    await limiter.async_acquire()
+    limiter.release(False)
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+    await limiter.async_acquire()
+    limiter.release(True)
+    assert limiter.limit == 4.25
+
+    for _ in range(5):
+        await limiter.async_acquire()
+        limiter.release(False)
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_aimd_cooldown():
+    """Test that simultaneous failures only shrink the limit once."""
+    limiter = AIMDLimiter(initial=8, cooldown=60)
+    for _ in range(3):
+        await limiter.async_acquire()
+    for _ in range(3):
+        limiter.release(False)
+    assert limiter.limit == 4
+
+
+@pytest.mark.asyncio
+async def test_aimd_cancelled_waiter():
+    """Test that a cancelled waiter doesn't leak a slot."""
+    limiter = AIMDLimiter(initial=1)
+    await limiter.async_acquire()
+
+    waiter = asyncio.ensure_future(limiter.async_acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    limiter.release(None)
+    assert limiter.in_flight == 0
+    assert limiter.snapshot()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_api_with_limiter(aresponses, login_success_response):
+    """Test that API requests go through the limiter."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=load_fixture("history_response.json"), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(
+            text=json.dumps({"code": 999, "msg": "Server error"}), status=200
+        ),
+    )
+
+    limiter = RequestLimiter(initial=4, cooldown=0)
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, limiter=limiter)
+        await api.async_authenticate()
+        await api.async_get_history()
+        with pytest.raises(ServerError):
+            await api.async_get_history()
+        await api.async_close()
+
+    snapshot = limiter.snapshot()
+    assert set(snapshot["buckets"]) == {
+        "https://mysecurity.eufylife.com/api/v1/passport",
+        "https://security-app.eufylife.com/v1/event",
+    }
+    concurrency = snapshot["concurrency"]["https://security-app.eufylife.com/v1"]
+    assert concurrency["in_flight"] == 0
+    assert concurrency["decreases"] == 1
+    assert concurrency["limit"] == 2.125
@@ -0,0 +1,152 @@
+"""Define tests for request instrumentation."""
+import json
+
+import aiohttp
+import pytest
+
+from eufy_security.api import API
+from eufy_security.errors import ServerError
+from eufy_security.metrics import (
+    Histogram,
+    MetricsAggregator,
+    MetricsHook,
+    RequestSample,
+    create_trace_config,
+)
+
+from .common import TEST_EMAIL, TEST_PASSWORD, load_fixture
+
+
+def test_histogram():
+    """Test histogram buckets and percentiles."""
+    histogram = Histogram(bounds=(1, 2, 4, float("inf")))
+    assert histogram.percentile(50) is None
+
+    for value in (0.5, 0.5, 1.5, 3, 10):
+        histogram.add(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {1: 2, 2: 1, 4: 1, float("inf"): 1}
+    assert snapshot["count"] == 5
+    assert snapshot["max"] == 10
+    assert snapshot["mean"] == 3.1
+    assert histogram.percentile(40) == 1
+    assert 2 < histogram.percentile(80) <= 4
+    assert histogram.percentile(100) == 10
+
+
+def test_sample_phases():
+    """Test that the phases of a sample add up to its total."""
+    sample = RequestSample("post", "app/get_devs_list", 10)
+    sample.connection_started()
+    sample.connection_finished()
+    sample.headers_received(200)
+    sample.body_read(100)
+    sample.body_decoded()
+    sample.finish()
+
+    assert sample.status == 200
+    assert sample.response_bytes == 100
+    phases = [sample.connect, sample.wait, sample.read, sample.decode]
+    assert all(phase >= 0 for phase in phases)
+    assert sum(phases) <= sample.total
+
+
+def test_aggregator():
+    """Test aggregating samples per endpoint."""
+    aggregator = MetricsAggregator()
+    ok = RequestSample("post", "app/get_devs_list", 10)
+    ok.headers_received(200)
+    ok.code = 0
+    ok.finish()
+    failed = RequestSample("post", "app/get_devs_list", 10)
+    failed.finish(ServerError("Server error"))
+
+    aggregator.record(ok)
+    aggregator.record(failed)
+    aggregator.record_retry("app/get_devs_list")
+    aggregator.record_reauth("app/get_hub_list")
+
+    snapshot = aggregator.snapshot()
+    devices = snapshot["app/get_devs_list"]
+    assert devices["requests"] == 2
+    assert devices["request_bytes"] == 20
+    assert devices["statuses"] == {200: 1}
+    assert devices["codes"] == {0: 1}
+    assert devices["errors"] == {"ServerError": 1}
+    assert devices["retries"] == 1
+    assert devices["timings"]["total"]["count"] == 2
+    assert devices["timings"]["connect"]["count"] == 0
+    assert snapshot["app/get_hub_list"]["reauths"] == 1
+
+    aggregator.reset()
+    assert aggregator.snapshot() == {}
+
+
+@pytest.mark.asyncio
+async def test_api_metrics(aresponses, login_success_response):
+    """Test that the API records every request."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=None, status=401),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=load_fixture("history_response.json"), status=200),
+    )
+
+    async with aiohttp.ClientSession(
+        trace_configs=[create_trace_config()]
+    ) as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession)
+        await api.async_authenticate()
+        await api.async_get_history()
+        await api.async_close()
+
+    snapshot = api.metrics.snapshot()
+    assert snapshot["passport/login"]["requests"] == 2
+    assert snapshot["passport/login"]["request_bytes"] > 0
+
+    history = snapshot["event/app/get_all_history_record"]
+    assert history["requests"] == 2
+    assert history["reauths"] == 1
+    assert history["statuses"] == {401: 1, 200: 1}
+    assert history["codes"] == {0: 1}
+    assert history["errors"] == {"ClientResponseError": 1}
+    assert history["response_bytes"] == len(load_fixture("history_response.json"))
+    assert history["timings"]["decode"]["count"] == 1
+    assert snapshot["passport/login"]["timings"]["connect"]["count"] >= 1
+    assert history["timings"]["total"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_api_metrics_disabled(aresponses, login_success_response):
+    """Test that metrics can be turned off."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(TEST_EMAIL, TEST_PASSWORD, websession, metrics=MetricsHook())
+        await api.async_authenticate()
+        await api.async_close()
+        assert not hasattr(api.metrics, "snapshot")
@@ -4,7 +4,7 @@ from datetime import datetime, timezone
 
 import pytest
 
-from eufy_security.param import Param, Params
+from eufy_security.param import Param, Params, _decode_cached, decode_value
 from eufy_security.types import ParamType
 
 
@@ -105,6 +105,7 @@ def test_params_init():
         ]
     )
     assert len(params) == 2
+    assert params.unknown == [{"param_type": 0, "param_value": "0"}]
 
 
 def test_params_contains():
@@ -182,3 +183,108 @@ def test_params_update():
     params = Params()
     params.update({ParamType.CHIME_STATE: 1})
     assert params[ParamType.CHIME_STATE].value == 1
+
+
+def test_params_changed():
+    """Test finding the values that differ from the current params."""
+    params = Params(
+        [
+            {"param_type": ParamType.CAMERA_PIR.value, "param_value": "1"},
+            {"param_type": ParamType.DETECT_SWITCH.value, "param_value": "1"},
+            {"param_type": ParamType.CHIME_STATE.value, "param_value": "2"},
+        ]
+    )
+    changed = params.changed(
+        {
+            ParamType.CAMERA_PIR: True,
+            "DETECT_SWITCH": 1,
+            ParamType.CHIME_STATE.value: 3,
+            ParamType.VOLUME: 10,
+        }
+    )
+    assert changed == {ParamType.CHIME_STATE: 3, ParamType.VOLUME: 10}
+
+
+def test_params_index_follows_list_changes():
+    """Test that lookups stay correct as the list changes."""
+    params = Params([{"param_type": ParamType.CHIME_STATE, "param_id": 1}])
+    detect_exposure = Param({"param_type": ParamType.DETECT_EXPOSURE, "param_id": 2})
+
+    params.append(detect_exposure)
+    assert params[ParamType.DETECT_EXPOSURE] is detect_exposure
+    assert len(params) == 2
+
+    params.remove(detect_exposure)
+    assert ParamType.DETECT_EXPOSURE not in params
+
+    params += [detect_exposure]
+    assert ParamType.DETECT_EXPOSURE in params
+
+    assert params.pop().type == ParamType.DETECT_EXPOSURE
+    assert ParamType.DETECT_EXPOSURE not in params
+
+    params.insert(0, detect_exposure)
+    assert list(params.items()) == [ParamType.DETECT_EXPOSURE, ParamType.CHIME_STATE]
+
+    params.clear()
+    assert ParamType.CHIME_STATE not in params
+
+
+def test_param_value_falsy_is_memoized():
+    """Test that falsy values are only decoded once."""
+    _decode_cached.cache_clear()
+    param = Param({"param_type": ParamType.CAMERA_PIR.value, "param_value": "0"})
+    assert param.value is False
+    assert param.value is False
+    assert _decode_cached.cache_info().misses == 1
+    assert _decode_cached.cache_info().hits == 0
+
+
+def test_param_value_decode_cache_is_shared():
+    """Test that params with the same raw value share immutable values."""
+    _decode_cached.cache_clear()
+    param1 = Param({"param_type": ParamType.CAMERA_PIR.value, "param_value": "1"})
+    param2 = Param({"param_type": ParamType.CAMERA_PIR.value, "param_value": "1"})
+    assert param1.value is True
+    assert param2.value is True
+    assert _decode_cached.cache_info().hits == 1
+
+    # The same raw value of another type is decoded separately:
+    param3 = Param({"param_type": ParamType.CHIME_STATE.value, "param_value": "0"})
+    param4 = Param({"param_type": ParamType.CAMERA_PIR.value, "param_value": "0"})
+    assert param3.value == 0
+    assert param4.value is False
+
+
+def test_param_value_json_is_not_shared():
+    """Test that params with the same JSON value don't share it."""
+    _decode_cached.cache_clear()
+    raw_value = ParamType.SNOOZE_MODE.dumps({"snooze_time": 0})
+    params1 = Params(
+        [{"param_type": ParamType.SNOOZE_MODE.value, "param_value": raw_value}]
+    )
+    params2 = Params(
+        [{"param_type": ParamType.SNOOZE_MODE.value, "param_value": raw_value}]
+    )
+    value = params1[ParamType.SNOOZE_MODE].value
+    assert value == params2[ParamType.SNOOZE_MODE].value
+    assert value is not params2[ParamType.SNOOZE_MODE].value
+    # The blob was only decoded once:
+    assert _decode_cached.cache_info().misses == 1
+
+    value["snooze_time"] = 60
+    assert params2[ParamType.SNOOZE_MODE].value == {"snooze_time": 0}
+    assert params1.changed({ParamType.SNOOZE_MODE: value}) == {
+        ParamType.SNOOZE_MODE: {"snooze_time": 60}
+    }
+
+
+def test_decode_value_is_typed():
+    """Test that equal raw values of different types are decoded separately."""
+    assert decode_value(ParamType.CUSTOM_RTSP_URL, 1) == "1"
+    assert decode_value(ParamType.CUSTOM_RTSP_URL, True) == "True"
+
+
+def test_decode_value_unhashable():
+    """Test decoding raw values that can't be cached."""
+    assert decode_value(ParamType.CUSTOM_RTSP_URL, ["a"]) == "['a']"
@@ -0,0 +1,172 @@
+"""Define tests for the retry policy."""
+import asyncio
+import json
+
+import aiohttp
+from aiohttp.client_exceptions import ClientResponseError
+import pytest
+
+from eufy_security.api import API
+from eufy_security.errors import InvalidCredentialsError, RequestError, ServerError
+from eufy_security.retry import RetryPolicy
+
+from .common import TEST_EMAIL, TEST_PASSWORD, load_fixture
+
+
+def _response_error(status):
+    """Return a response error with the given HTTP status."""
+    return ClientResponseError(None, (), status=status)
+
+
+def test_is_retryable():
+    """Test classifying errors as transient or fatal."""
+    policy = RetryPolicy()
+    assert policy.is_retryable(ServerError("Server error"))
+    assert policy.is_retryable(asyncio.TimeoutError())
+    assert policy.is_retryable(aiohttp.ServerDisconnectedError())
+    assert policy.is_retryable(_response_error(503))
+    assert not policy.is_retryable(_response_error(400))
+    assert not policy.is_retryable(InvalidCredentialsError("Bad token"))
+    assert not policy.is_retryable(RequestError("Empty response"))
+
+
+def test_backoff():
+    """Test that the backoff is jittered and capped."""
+    policy = RetryPolicy(base_delay=1, max_delay=4)
+    for attempt in range(1, 10):
+        assert 0 <= policy.backoff(attempt) <= min(4, 2 ** (attempt - 1))
+
+
+@pytest.mark.asyncio
+async def test_retry_until_success():
+    """Test that transient errors are retried up to the maximum attempts."""
+    errors = [ServerError("Server error"), _response_error(502)]
+    retried = []
+
+    async def func():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    policy = RetryPolicy(base_delay=0)
+    result = await policy.async_call(func, "app/get_devs_list", on_retry=retried.append)
+    assert result == "ok"
+    assert len(retried) == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_gives_up():
+    """Test that the last error is raised once attempts run out."""
+    calls = []
+
+    async def func():
+        calls.append(None)
+        raise ServerError("Server error")
+
+    policy = RetryPolicy(max_attempts=2, base_delay=0)
+    with pytest.raises(ServerError):
+        await policy.async_call(func, "app/get_devs_list")
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_no_retry_for_fatal_or_unsafe():
+    """Test that fatal errors and unsafe endpoints are not retried."""
+    calls = []
+
+    async def fatal():
+        calls.append(None)
+        raise _response_error(400)
+
+    async def transient():
+        calls.append(None)
+        raise ServerError("Server error")
+
+    policy = RetryPolicy(base_delay=0)
+    with pytest.raises(ClientResponseError):
+        await policy.async_call(fatal, "app/get_devs_list")
+    assert len(calls) == 1
+
+    with pytest.raises(ServerError):
+        await policy.async_call(transient, "app/upload_devs_params")
+    assert len(calls) == 2
+
+    with pytest.raises(ServerError):
+        await policy.async_call(transient, "app/upload_devs_params", safe=True)
+    assert len(calls) == 5
+
+
+@pytest.mark.asyncio
+async def test_deadline():
+    """Test that no retry is attempted past the deadline."""
+    calls = []
+
+    async def func():
+        calls.append(None)
+        raise ServerError("Server error")
+
+    policy = RetryPolicy(max_attempts=10, base_delay=1, deadline=0.01)
+    policy.backoff = lambda attempt: 1
+    with pytest.raises(ServerError):
+        await policy.async_call(func, "app/get_devs_list")
+    assert len(calls) == 1
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await policy.async_call(slow, "app/get_devs_list")
+
+
+@pytest.mark.asyncio
+async def test_api_retries_transient_errors(aresponses, login_success_response):
+    """Test that the API retries transient HTTP and Eufy errors."""
+    aresponses.add(
+        "mysecurity.eufylife.com",
+        "/api/v1/passport/login",
+        "post",
+        aresponses.Response(text=json.dumps(login_success_response), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=None, status=503),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(
+            text=json.dumps({"code": 999, "msg": "Server error"}), status=200
+        ),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/event/app/get_all_history_record",
+        "post",
+        aresponses.Response(text=load_fixture("history_response.json"), status=200),
+    )
+    aresponses.add(
+        "security-app.eufylife.com",
+        "/v1/app/upload_devs_params",
+        "post",
+        aresponses.Response(text=None, status=503),
+    )
+
+    async with aiohttp.ClientSession() as websession:
+        api = API(
+            TEST_EMAIL,
+            TEST_PASSWORD,
+            websession,
+            retry_policy=RetryPolicy(base_delay=0),
+        )
+        await api.async_authenticate()
+        history = await api.async_get_history()
+        assert len(history) == 2
+        assert api.retries == 2
+
+        with pytest.raises(RequestError):
+            await api.request("post", "app/upload_devs_params", json={})
+        assert api.retries == 2
+        await api.async_close()
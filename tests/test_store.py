@@ -0,0 +1,65 @@
+"""Define tests for stores."""
+import os
+import stat
+
+import pytest
+
+from eufy_security.store import FileStore, MemoryStore, Store
+
+
+@pytest.mark.asyncio
+async def test_memory_store():
+    """Test saving, loading and removing entries in memory."""
+    store = MemoryStore()
+    assert await store.async_load("key") is None
+
+    await store.async_save("key", {"value": 1})
+    assert await store.async_load("key") == {"value": 1}
+
+    await store.async_remove("key")
+    assert await store.async_load("key") is None
+
+
+@pytest.mark.asyncio
+async def test_file_store(tmp_path):
+    """Test saving, loading and removing entries in a file."""
+    path = str(tmp_path / "store.json")
+    store = FileStore(path)
+    assert await store.async_load("key") is None
+
+    await store.async_save("key", {"value": 1})
+    await store.async_save("other", {"value": 2})
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    store = FileStore(path)
+    assert await store.async_load("key") == {"value": 1}
+    assert await store.async_load("other") == {"value": 2}
+
+    await store.async_remove("key")
+    assert await store.async_load("key") is None
+    assert await store.async_load("other") == {"value": 2}
+
+
+@pytest.mark.asyncio
+async def test_file_store_unreadable(tmp_path):
+    """Test that a corrupt file is treated as empty."""
+    path = tmp_path / "store.json"
+    path.write_text("not json")
+    store = FileStore(str(path))
+    assert await store.async_load("key") is None
+
+
+def test_incomplete_store():
+    """Test that a store missing methods can't be created."""
+
+    class IncompleteStore(Store):
+        """Define a store without async_remove."""
+
+        async def async_load(self, key):
+            """Return nothing."""
+
+        async def async_save(self, key, data):
+            """Store nothing."""
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
@@ -1,7 +1,7 @@
 """Define tests for params."""
 import pytest
 
-from eufy_security.types import ParamType
+from eufy_security.types import CAMERA_TYPES, DOORBELL_TYPES, DeviceType, ParamType
 
 
 def test_param_type_loads():
@@ -25,3 +25,23 @@ def test_param_type_lookup():
     assert ParamType.lookup(ParamType.CHIME_STATE) == ParamType.CHIME_STATE
     with pytest.raises(ValueError):
         ParamType.lookup(0)
+
+
+def test_device_type_categories():
+    """Test DeviceType categories."""
+    assert DOORBELL_TYPES <= CAMERA_TYPES
+    assert DeviceType.BATTERY_DOORBELL.is_camera
+    assert DeviceType.BATTERY_DOORBELL.is_doorbell
+    assert not DeviceType.CAMERA.is_doorbell
+    assert DeviceType.MOTION_SENSOR.is_sensor
+    assert DeviceType.STATION.is_station
+    assert not DeviceType.STATION.is_camera
+    assert not DeviceType.KEYPAD.is_camera
+
+
+def test_param_type_lookup_invalid():
+    """Test ParamType lookup with invalid values."""
+    with pytest.raises(KeyError):
+        ParamType.lookup("UNKNOWN")
+    with pytest.raises(ValueError):
+        ParamType.lookup([])